@@ -10,63 +10,99 @@ field, then calculates the acreage value.
 
 Feature layers are privately owned parcel polygons containing forested areas in
 each of the 29 counties in Utah.  Output of export_forest_parcels.py
+
+All of the new fields are added in one AddFields call (one schema change per county
+instead of three), and the parcel area is written in a single update cursor pass,
+read from the SHAPE@AREA token instead of a CalculateField expression.
+https://pro.arcgis.com/en/pro-app/tool-reference/data-management/add-fields.htm
 '''
 
 import arcpy
 import datetime
 import time
 
-print("starting")
-t1 = time.time() # start the timer to measure total runtime
+import stage_timer
+import gdb_lock
+import units
 
 # workspace must be set prior to listing feature classes
 input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
 arcpy.env.workspace = input_gdb
 
-# get all feature classes in the workspace
-fcs = arcpy.ListFeatureClasses(feature_type='polygon')  # returns a list of strings
+# fields to add:  [name, type]
+# Forest_Acres will contain the total acreage of forested land in this parcel
+# the 'Forest_pct' field will contain the forested percent of the parcel
+new_fields = [
+    ['Parcel_Acres', 'DOUBLE'],
+    ['Forest_Acres', 'DOUBLE'],
+    ['Forest_pct', 'DOUBLE'],
+    ]
+
+# field calculated from the parcel geometry, and its units
+area_field = 'Parcel_Acres'
+area_unit = 'acres'  # valid:  acres, hectares, squarefeet, squaremiles, squaremeters (units.AREA_UNITS)
+
+
+def add_fields(fc, fields):
+    '''Add all of the fields that don't exist yet, in one schema change.'''
+    existing = [f.name.lower() for f in arcpy.ListFields(fc)]
+    fields = [field for field in fields if field[0].lower() not in existing]
+    if fields:
+        # the schema change rewrites the geodatabase's list of tables, shared with other county jobs
+        with gdb_lock.gdb_write_lock(input_gdb):
+            arcpy.AddFields_management(fc, fields)
+
 
-# iterate through the feature classes
-for fc in fcs:
-    if '_privateforest' in fc:  # use the private forest parcel layers only
+def calculate_area(fc, field, unit):
+    '''Write the planar area of each feature to a field, in one update cursor pass.
 
-        print('\n', fc)
+    Returns the number of features updated.
+    '''
+    # SHAPE@AREA is in the units of the coordinate system (meters for UTM)
+    meters_per_unit = arcpy.Describe(fc).spatialReference.metersPerUnit
+    factor = meters_per_unit * meters_per_unit / units.AREA_UNITS[unit]
 
-        # select the private parcels
-        print("   adding 'Parcel_Acres' field")
-        starttime = time.time()  # start the stopwatch
+    count = 0
+    # SHAPE@AREA is read only, only the field is written back
+    with arcpy.da.UpdateCursor(fc, [field, 'SHAPE@AREA']) as cursor:
+        for row in cursor:
+            cursor.updateRow([row[1] * factor, row[1]])
+            count += 1
 
-        arcpy.AddField_management(fc, 'Parcel_Acres', 'DOUBLE')
+    return count
 
-        secs = round(time.time() - starttime, 1)
-        print("     done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
 
+def list_jobs():
+    '''Names of the private forest parcel layers to process.'''
+    # get all feature classes in the workspace
+    fcs = arcpy.ListFeatureClasses(feature_type='polygon')  # returns a list of strings
 
-        # calculate acreage
-        print("   calculating geometry: area in acres")
-        starttime = time.time()  # start the stopwatch
+    return [fc for fc in fcs if '_privateforest' in fc]  # use the private forest parcel layers only
 
-        arcpy.CalculateField_management(fc, "Parcel_Acres", "!SHAPE.AREA@ACRES!", "PYTHON3")
 
-        secs = round(time.time() - starttime, 1)
-        print("     done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+def process(fc):
+    '''Add the acreage fields to one private forest parcel layer, and calculate Parcel_Acres.'''
+    print('\n', fc)
 
+    message = "   adding fields: " + ", ".join(field[0] for field in new_fields)
+    with stage_timer.StageTimer(fc, 'add fields', message):
+        add_fields(fc, new_fields)
 
-        # add two new (empty) fields for future use
-        # Forest_Acres will contain the total acreage of forested land in this parcel
-        # the 'Forest_pct' field will contain the forested percent of the parcel
+    # calculate acreage
+    with stage_timer.StageTimer(fc, 'parcel acres', "   calculating geometry: area in " + area_unit) as t:
+        t.features_in = calculate_area(fc, area_field, area_unit)
 
-        print("   adding 'Forest_Acres' field")
-        arcpy.AddField_management(fc, 'Forest_Acres', "DOUBLE")
 
-        print("   adding 'Forest_pct' field")
-        arcpy.AddField_management(fc, 'Forest_pct', "DOUBLE")
+if __name__ == '__main__':
 
-        secs = round(time.time() - starttime, 1)
-        print("     done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
 
+    # iterate through the feature classes
+    for fc in list_jobs():
+        process(fc)
 
-t2 = time.time() # stop the total runtime timer
-secs = round(t2 - t1, 1)
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
 
-print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
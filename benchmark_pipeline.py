@@ -0,0 +1,369 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Repeatable benchmark of the forest parcel workflow on synthetic data, so the scripts can
+be timed without the confidential county parcel layers.
+
+A seeded generator builds a test geodatabase that looks like the real one:
+  Parcels_County01 ... - county parcel fabrics:  rows of lots with lognormal widths and depths,
+                         so there are many small lots and a few large ones.  OWN_TYPE is a mix
+                         of private and public owners, with the spelling variations of the
+                         real data ("Private", "PRIVATE", "private")
+  NLCD_2016_UT_Forest_polygon_NAD83utm12 - forest mask on a 30m grid (smoothed noise, so the
+                         forest comes in patches), polygonized like the NLCD polygon layer,
+                         with staircase pixel edges
+  Mgmt_Areas_1 ...     - large polygon layers (Voronoi cells over the state) for the
+                         intersect_summarize.py cross product
+and a 30m land cover raster (class 42 forest, 52 shrub) for zonal_forest_acres.py
+
+Scales (number of counties, parcels per county):
+  county  - one small county
+  region  - 5 counties
+  state   - 29 counties, about one million parcels
+
+The same seed and scale always give the same data.  The geodatabase is built once per
+scale and reused by later runs.
+
+Stages timed for each county, with the in-process engines (no arcpy, runs on Linux).  Each
+stage calls the function the scripts run for that step, on the test geodatabase and raster,
+so a slower step shows up here:
+  select           private parcels and the forest polygons near them
+                   (forest_parcels_pipeline.select_county)
+  select pushdown  private parcels intersecting forest, saved to _privateforest
+                   (pushdown_select.py, export_forest_parcels.py engine = 'pushdown')
+  intersect        parcels x forest polygons (forest_parcels_pipeline.intersect_forest)
+  intersect tiled  _privateforest x forest polygons, one tile at a time, saved to _intersect
+                   (tiled_intersect.py, intersect_forest_parcels.py tiled = True)
+  summary          forest acres per parcel (forest_parcels_pipeline.summarize)
+  acreage          Parcel_Acres of the forested parcels (forest_parcels_pipeline.add_parcel_acres)
+  join             Forest_Acres and Forest_pct (forest_parcels_pipeline.join_forest_acres)
+  save             save the privateforest layer (forest_parcels_pipeline.save_layer)
+  threshold        save the threshold layers (forest_parcels_pipeline.save_thresholds)
+  zonal            forest acres from the raster (zonal_forest_acres.forest_acres)
+and the cross product of the county parcel layers and the Mgmt_Areas layers, as in
+intersect_summarize.py (aggregate only).
+
+Timings are saved with stage_timer.py (one run per benchmark), then the time, features
+per second and memory of each stage are printed:  the peak memory of the process during the
+stage, and how much of it the stage added to the memory in use when it started (Linux).  With a baseline log (an earlier
+benchmark run), the change per stage is printed too.
+
+Usage:  python benchmark_pipeline.py [county|region|state] [<baseline log>]
+The data and the timing log are saved in bench_dir (FOREST_BENCH_DIR environment variable,
+default: forest_bench in the temp folder).
+'''
+
+import datetime
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import geopandas as gpd
+import numpy as np
+import pyogrio
+import rasterio
+import rasterio.features
+import shapely
+from affine import Affine
+
+bench_dir = os.environ.get('FOREST_BENCH_DIR', os.path.join(tempfile.gettempdir(), 'forest_bench'))
+
+# stage_timer reads the log path when it is imported, so it is set first
+os.makedirs(bench_dir, exist_ok=True)
+os.environ.setdefault('FOREST_TIMING_LOG', os.path.join(bench_dir, 'benchmark_timings.jsonl'))
+
+import forest_index
+import forest_parcels_pipeline
+import pushdown_select
+import stage_timer
+import tiled_intersect
+import vector_intersect
+import zonal_forest_acres
+
+# number of counties, parcels per county
+SCALES = {
+    'county': (1, 2000),
+    'region': (5, 10000),
+    'state': (29, 35000),
+    }
+
+seed = 2020
+
+# feature layer containing forest cover layer
+forest = r'NLCD_2016_UT_Forest_polygon_NAD83utm12'
+
+# NLCD pixel size, and the corner of the synthetic state (NAD83 UTM zone 12N)
+CELL = 30.0
+X0, Y0 = 230000.0, 4100000.0
+COUNTY_COLUMNS = 6
+
+# average lot width, in meters
+LOT_SIZE = 200.0
+
+# share of the land covered by forest
+forest_cover = 0.3
+
+# owner types and their share of the parcels
+OWNERS = ['Private', 'BLM', 'USFS', 'State', 'Tribal', 'Local Government']
+OWNER_SHARE = [0.70, 0.10, 0.08, 0.07, 0.03, 0.02]
+
+# memory budget of the tiled intersect (MB), small so the bench counties are split into
+# several tiles, as the state counties are at the default budget
+tiled_memory_mb = 2
+
+# number of Mgmt_Areas layers, and polygons in each
+mgmt_layers = 3
+mgmt_polygons = 40
+
+CRS = 'EPSG:26912'
+
+
+def make_parcels(rng, n, xmin, ymin):
+    '''Parcel fabric of about n lots, in rows, with the lower left corner at (xmin, ymin).
+
+    Returns (GeoDataFrame, side of the county square in meters)
+    '''
+    nrows = max(int(np.sqrt(n)), 1)
+    ncols = max(n // nrows, 1)
+    side = np.sqrt(nrows * ncols) * LOT_SIZE
+
+    # row depths and lot widths, scaled to fill the county square
+    depths = rng.lognormal(0.0, 0.5, nrows)
+    depths = np.cumsum(np.r_[0, depths / depths.sum() * side])
+    widths = rng.lognormal(0.0, 0.8, (nrows, ncols))
+    edges = np.cumsum(np.c_[np.zeros(nrows), widths / widths.sum(axis=1, keepdims=True) * side], axis=1)
+
+    x0 = xmin + edges[:, :-1].ravel()
+    x1 = xmin + edges[:, 1:].ravel()
+    y0 = ymin + np.repeat(depths[:-1], ncols)
+    y1 = ymin + np.repeat(depths[1:], ncols)
+
+    owners = rng.choice(OWNERS, size=len(x0), p=OWNER_SHARE).astype(object)
+
+    # the spelling of private varies between counties in the real data
+    private = np.flatnonzero(owners == 'Private')
+    variant = rng.random(len(private))
+    owners[private[variant < 0.10]] = 'PRIVATE'
+    owners[private[(variant >= 0.10) & (variant < 0.15)]] = 'private'
+
+    parcels = gpd.GeoDataFrame({'OWN_TYPE': owners}, geometry=shapely.box(x0, y0, x1, y1), crs=CRS)
+    return parcels, side
+
+
+def make_forest_mask(rng, nrows, ncols, cover=0.3, patch=16):
+    '''Forest / not forest pixels, in patches about patch pixels across.'''
+    # coarse noise, enlarged to the pixel grid, plus some pixel noise for ragged edges
+    coarse = rng.random((nrows // patch + 2, ncols // patch + 2))
+    field = np.kron(coarse, np.ones((patch, patch)))[:nrows, :ncols]
+    field += rng.random((nrows, ncols)) * 0.3
+
+    return field >= np.quantile(field, 1 - cover)
+
+
+def polygonize(mask, transform):
+    '''Polygons of the connected forest pixels (staircase edges, like the NLCD polygon layer).'''
+    shapes = rasterio.features.shapes(mask.astype('uint8'), mask=mask, connectivity=4, transform=transform)
+    return [shapely.geometry.shape(geom) for geom, value in shapes]
+
+
+def bench_gdb(scale):
+    return os.path.join(bench_dir, 'bench_{}_{}.gdb'.format(scale, seed))
+
+
+def bench_raster(scale):
+    return os.path.join(bench_dir, 'bench_{}_{}_nlcd.tif'.format(scale, seed))
+
+
+def make_data(scale):
+    '''Build the test geodatabase and land cover raster of a scale, unless they already exist.'''
+    gdb = bench_gdb(scale)
+    done = gdb + '.json'
+    if os.path.exists(done):
+        return gdb
+
+    print("building", scale, "test data")
+    ncounties, nparcels = SCALES[scale]
+    rng = np.random.default_rng(seed)
+
+    shutil.rmtree(gdb, ignore_errors=True)
+
+    # counties in rows of COUNTY_COLUMNS, side by side
+    side = None
+    for i in range(ncounties):
+        xmin = X0 + (i % COUNTY_COLUMNS) * (side or 0)
+        ymin = Y0 + (i // COUNTY_COLUMNS) * (side or 0)
+        parcels, side = make_parcels(rng, nparcels, xmin, ymin)
+        pyogrio.write_dataframe(parcels, gdb, layer='Parcels_County{:02d}'.format(i + 1), driver='OpenFileGDB')
+
+    # one land cover raster over the whole state, snapped to the 30m grid
+    ncols = int(np.ceil(side * min(ncounties, COUNTY_COLUMNS) / CELL))
+    nrows = int(np.ceil(side * ((ncounties - 1) // COUNTY_COLUMNS + 1) / CELL))
+    transform = Affine(CELL, 0, X0, 0, -CELL, Y0 + nrows * CELL)
+
+    mask = make_forest_mask(rng, nrows, ncols, forest_cover)
+    forest_polys = polygonize(mask, transform)
+    forest_df = gpd.GeoDataFrame({'gridcode': np.full(len(forest_polys), 42, dtype='int32')},
+                                 geometry=forest_polys, crs=CRS)
+    pyogrio.write_dataframe(forest_df, gdb, layer=forest, driver='OpenFileGDB')
+
+    landcover = np.where(mask, 42, 52).astype('uint8')  # evergreen forest, shrub
+    with rasterio.open(bench_raster(scale), 'w', driver='GTiff', width=ncols, height=nrows, count=1,
+                       dtype='uint8', crs=CRS, transform=transform, compress='deflate') as dst:
+        dst.write(landcover, 1)
+
+    # management areas:  Voronoi cells of random points over the state
+    extent = shapely.box(X0, Y0, X0 + ncols * CELL, Y0 + nrows * CELL)
+    for i in range(mgmt_layers):
+        points = shapely.points(rng.uniform(X0, X0 + ncols * CELL, mgmt_polygons),
+                                rng.uniform(Y0, Y0 + nrows * CELL, mgmt_polygons))
+        cells = shapely.get_parts(shapely.voronoi_polygons(shapely.multipoints(points), extend_to=extent))
+        cells = shapely.intersection(cells, extent)
+        pyogrio.write_dataframe(gpd.GeoDataFrame(geometry=cells, crs=CRS), gdb,
+                                layer='Mgmt_Areas_{}'.format(i + 1), driver='OpenFileGDB')
+
+    with open(done, 'w') as f:
+        json.dump({'scale': scale, 'seed': seed, 'counties': ncounties, 'parcels': nparcels,
+                   'forest_polygons': len(forest_polys)}, f, indent=2)
+
+    return gdb
+
+
+def bench_county(gdb, raster, index, fc):
+    '''Time each step of the workflow for one county parcel layer, with the functions the scripts run.'''
+    print('\n', fc)
+
+    # the pipeline reads and writes the geodatabase of its settings
+    pipeline = forest_parcels_pipeline
+    pipeline.input_gdb = gdb
+    pipeline.storage = 'gdb'
+    pipeline.use_forest_index = True
+
+    with stage_timer.StageTimer(fc, 'select', "   selecting private parcels and forest pixels") as t:
+        parcels, forest_polys = pipeline.select_county(fc)
+        t.features_out = len(parcels)
+
+    message = "   selecting private parcels intersecting forest (pushdown)"
+    with stage_timer.StageTimer(fc, 'select pushdown', message) as t:
+        counts = pushdown_select.select_forest_parcels(gdb, fc, forest, fc + '_privateforest', index)
+        t.features_in = counts['features']
+        t.features_out = counts['forest']
+
+    with stage_timer.StageTimer(fc, 'intersect', "   intersecting forest pixels and private parcels", len(parcels)) as t:
+        parcel_idx, acres, pieces = pipeline.intersect_forest(parcels, forest_polys, fc)
+        t.features_out = len(acres)
+
+    message = "   intersecting forest pixels and private forest parcels (tiled)"
+    with stage_timer.StageTimer(fc, 'intersect tiled', message, counts['forest']) as t:
+        t.features_out, tiles = tiled_intersect.intersect_layer_tiled(
+            gdb, fc + '_privateforest', forest, fc + '_privateforest_intersect', tiled_memory_mb, index)
+    print("     {} tiles".format(tiles))
+
+    with stage_timer.StageTimer(fc, 'summary', "   summarizing forest acres per parcel", len(acres)) as t:
+        forest_acres, counts = pipeline.summarize(parcel_idx, acres, len(parcels))
+        out = pipeline.forested_parcels(parcels, counts)
+        t.features_out = len(out)
+
+    with stage_timer.StageTimer(fc, 'acreage', "   calculating parcel acres", len(out)):
+        pipeline.add_parcel_acres(out)
+
+    with stage_timer.StageTimer(fc, 'join', "   joining forest acres, calculating forest percent", len(out)):
+        pipeline.join_forest_acres(out, forest_acres[counts > 0])
+
+    with stage_timer.StageTimer(fc, 'save', "   saving the private forest parcels", len(out)):
+        pipeline.save_layer(out, fc, '_privateforest')
+
+    with stage_timer.StageTimer(fc, 'threshold', "   saving the threshold layers", len(out)):
+        pipeline.save_thresholds(out, fc)
+
+    with stage_timer.StageTimer(fc, 'zonal', "   counting forest pixels from the raster", len(parcels)):
+        zonal_forest_acres.forest_acres(parcels, raster, zonal_forest_acres.FOREST_CLASSES,
+                                        zonal_forest_acres.fractional, zonal_forest_acres.supersample)
+
+
+def bench_cross_product(gdb, fcs):
+    '''Intersect every county parcel layer with every Mgmt_Areas layer, and sum the acres per pair.'''
+    mgmt = ['Mgmt_Areas_{}'.format(i + 1) for i in range(mgmt_layers)]
+    areas = dict((name, vector_intersect.read_layer(gdb, name).geometry.values) for name in mgmt)
+
+    for fc in fcs:
+        print('\n', fc)
+        with stage_timer.StageTimer(fc, 'cross product', "   intersecting with the Mgmt_Areas layers") as t:
+            parcels = vector_intersect.read_layer(gdb, fc).geometry.values
+            t.features_in = len(parcels) * len(mgmt)
+
+            sums = {}
+            for name in mgmt:
+                parcel_idx, area_idx, pieces, acres = vector_intersect.intersect_geometries(parcels, areas[name])
+                sums[name] = [len(pieces), acres.sum()]
+            t.features_out = sum(count for count, total in sums.values())
+
+
+def summarize(records):
+    '''Print the time, throughput and memory of each stage.
+
+    peak MB is the largest peak of the process during the stage, added MB the most the stage
+    added to the memory in use when it started (blank where stage_timer can't measure it).
+    '''
+    secs = defaultdict(float)
+    features = defaultdict(int)
+    peak = {}
+    added = {}
+    for record in records:
+        stage = record['stage']
+        secs[stage] += record['wall_secs']
+        features[stage] += record['features_in'] or record['features_out'] or 0
+        if record.get('stage_peak_mb') is not None:
+            peak[stage] = max(peak.get(stage, 0), record['stage_peak_mb'])
+            added[stage] = max(added.get(stage, 0), record['stage_added_mb'])
+
+    print("\n{:<18}{:>10}{:>12}{:>14}{:>10}{:>10}".format('stage', 'seconds', 'features', 'features/s',
+                                                          'peak MB', 'added MB'))
+    for stage in sorted(secs, key=secs.get, reverse=True):
+        rate = features[stage] / secs[stage] if secs[stage] > 0 else 0
+        memory = "{:>10.0f}{:>10.0f}".format(peak[stage], added[stage]) if stage in peak else ''
+        print("{:<18}{:>10.2f}{:>12,}{:>14,.0f}".format(stage, secs[stage], features[stage], rate) + memory)
+
+
+def run(scale):
+    '''Build (or reuse) the data of a scale and time every stage.  Returns the timing records.'''
+    gdb = make_data(scale)
+    raster = bench_raster(scale)
+
+    with stage_timer.StageTimer(scale, 'forest index', "building the forest index") as t:
+        index = forest_index.open_index(gdb, forest, rebuild=True)
+        t.features_out = len(index.fids) + len(index.large_fids)
+
+    fcs = ['Parcels_County{:02d}'.format(i + 1) for i in range(SCALES[scale][0])]
+    for fc in fcs:
+        bench_county(gdb, raster, index, fc)
+
+    bench_cross_product(gdb, fcs)
+
+    return stage_timer.read_log(stage_timer.log_path, stage_timer.run_id)
+
+
+if __name__ == '__main__':
+
+    scale = sys.argv[1] if len(sys.argv) > 1 else 'county'
+    baseline = stage_timer.read_log(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    records = run(scale)
+
+    summarize(records)
+    print()
+    stage_timer.report(records, baseline)
+
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
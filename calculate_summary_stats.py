@@ -31,42 +31,55 @@ import arcpy
 import datetime
 import time
 
-print("starting")
-t1 = time.time() # start the timer to measure total runtime
+import gdb_lock
+import stage_timer
 
 # workspace must be set prior to listing feature classes
 input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
 arcpy.env.workspace = input_gdb
 
-# get all feature class names in the workspace, as a list of strings
-fcs = arcpy.ListFeatureClasses(feature_type='polygon')
 
-# filter out any feature class that does not have "intersect" in its name
-fcs = [fc for fc in fcs if "intersect" in fc]
+def list_jobs():
+    '''Names of the "intersect" feature classes to summarize.'''
+    # get all feature class names in the workspace, as a list of strings
+    fcs = arcpy.ListFeatureClasses(feature_type='polygon')
 
-# iterate through the "intersect" feature classes
-for fc in fcs:
+    # filter out any feature class that does not have "intersect" in its name
+    return [fc for fc in fcs if "intersect" in fc]
 
+
+def process(fc):
+    '''Summarize Forest_Acres by the parcel FID for one "intersect" feature class.'''
     print('\n', fc)
 
     # run the Summary Statistics function
-    print("   calculating summary statistics")
-    starttime = time.time()  # start the stopwatch
+    with stage_timer.StageTimer(fc, 'summary', "   calculating summary statistics") as t:
+        t.features_in = lambda: int(arcpy.GetCount_management(fc)[0])
+
+        # create the name of the field containing the FID Case Field
+        # add "FID_" and slice off "_intersect" from filename
+        casefield = "FID_" + fc[:-10]
+
+        # create the name of the output table
+        outtable = fc + "_summary"
+
+        # summarize the Forest_Acres field
+        # other county jobs add layers to the same geodatabase (run_counties_parallel.py)
+        with gdb_lock.gdb_write_lock(input_gdb):
+            arcpy.Statistics_analysis(fc, outtable, [["Forest_Acres", "SUM"]], casefield)
 
-    # create the name of the field containing the FID Case Field
-    # add "FID_" and slice off "_intersect" from filename
-    casefield = "FID_" + fc[:-10]
+        t.features_out = lambda: int(arcpy.GetCount_management(outtable)[0])
 
-    # create the name of the output table
-    outtable = fc + "_summary"
 
-    # summarize the Forest_Acres field
-    arcpy.Statistics_analysis(fc, outtable, [["Forest_Acres", "SUM"]], casefield)
+if __name__ == '__main__':
 
-    secs = round(time.time() - starttime, 1)
-    print("     done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
 
+    # iterate through the "intersect" feature classes
+    for fc in list_jobs():
+        process(fc)
 
-t2 = time.time() # stop the total runtime timer
-secs = round(t2 - t1, 1)
-print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
@@ -13,62 +13,104 @@ Forest cover data comes from the NLCD 2016 dataset
 For each county parcel layer, select the parcels that are privately owned
 from those selected parcels, select the parcels that intersect any forested area
 export that selection as a new layer of privately owned forested parcels for each county
+
+Selection engine:
+  arcpy     - SelectLayerByAttribute, SelectLayerByLocation, CopyFeatures (ArcGIS Pro)
+  pushdown  - one pass from pushdown_select.py:  OWN_TYPE column scan, then bounding box
+              test against the forest index, then the exact intersects test, with the
+              matches written as they are found.  No arcpy license is needed (Linux)
 '''
 
-import arcpy
 import datetime
 import time
 
-print("starting")
-t1 = time.time() # start the timer to measure total runtime
+import stage_timer
 
 # workspace must be set prior to listing feature classes
 input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
-arcpy.env.workspace = input_gdb
 
 # feature layer containing forest cover layer (select_features layer)
 forest = r'NLCD_2016_UT_Forest_polygon_NAD83utm12'
 
-# get all feature classes in the workspace
-fcs = arcpy.ListFeatureClasses(feature_type='polygon')  # returns a list of strings
+# selection engine - valid:  arcpy, pushdown
+engine = 'arcpy'
+
+if engine == 'arcpy':
+    import arcpy
+    import gdb_lock
+    import tile_forest_layer
+
+    arcpy.env.workspace = input_gdb
+
+elif engine == 'pushdown':
+    import forest_index
+    import pushdown_select
+    import vector_intersect
+
+
+def list_jobs():
+    '''Names of the county parcel layers to process.'''
+    # get all feature classes in the workspace
+    if engine == 'arcpy':
+        fcs = arcpy.ListFeatureClasses(feature_type='polygon')  # returns a list of strings
+    elif engine == 'pushdown':
+        fcs = vector_intersect.list_polygon_layers(input_gdb)
 
-# iterate through the feature classes
-for fc in fcs:
-    if fc != forest:  # skip the forest cover layer
+    return [fc for fc in fcs if not fc.startswith(forest)]  # skip the forest cover layer and its county tiles
 
-        print('\n', fc)
 
-        # select the private parcels
-        print("   selecting private parcels")
-        starttime = time.time()  # start the stopwatch
+def process(fc):
+    '''Export the privately owned, forested parcels of one county parcel layer.'''
+    print('\n', fc)
+
+    if engine == 'pushdown':
+        message = "   selecting private parcels intersecting forest, saving output layer"
+        with stage_timer.StageTimer(fc, 'select', message) as t:
+            # shared on-disk index of the forest layer, built by forest_index.py
+            index = forest_index.open_index(input_gdb, forest)
+            counts = pushdown_select.select_forest_parcels(input_gdb, fc, forest, fc + '_privateforest', index)
+            t.features_in = counts['features']
+            t.features_out = counts['forest']
+        print("     {features:,} parcels, {private:,} private, {bbox:,} near forest, {forest:,} forested".format(**counts))
+        return
+
+    # select the private parcels
+    with stage_timer.StageTimer(fc, 'select private', "   selecting private parcels") as t:
+        t.features_in = lambda: int(arcpy.GetCount_management(fc)[0])
         private_parcels = arcpy.SelectLayerByAttribute_management(
             fc,
             "NEW_SELECTION",
             "LOWER(OWN_TYPE) = 'private'"
             )
-        secs = round(time.time() - starttime, 1)
-        print("     done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+        t.features_out = lambda: int(arcpy.GetCount_management(private_parcels)[0])
 
-        # select the private parcels that intersect the forested areas
-        print("   selecting forested private")
-        starttime = time.time()  # start the stopwatch
+    # select the private parcels that intersect the forested areas
+    with stage_timer.StageTimer(fc, 'select forested', "   selecting forested private", t.features_out) as t:
         private_forested = arcpy.SelectLayerByLocation_management(
             private_parcels,
             "INTERSECT",
             selection_type="SUBSET_SELECTION",
-            select_features=forest
+            select_features=tile_forest_layer.county_forest(fc)  # county tile, made by tile_forest_layer.py
             )
-        secs = round(time.time() - starttime, 1)
-        print("     done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+        t.features_out = lambda: int(arcpy.GetCount_management(private_forested)[0])
 
-        # save the remaining features as a new layer
-        print("   saving output layer")
-        starttime = time.time()  # start the stopwatch
+    # save the remaining features as a new layer
+    with stage_timer.StageTimer(fc, 'save', "   saving output layer", t.features_out) as t:
         outlayername = fc + '_privateforest'
-        arcpy.CopyFeatures_management(private_forested, outlayername)
-        secs = round(time.time() - starttime, 1)
-        print("     done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+        # other county jobs add layers to the same geodatabase (run_counties_parallel.py)
+        with gdb_lock.gdb_write_lock(input_gdb):
+            arcpy.CopyFeatures_management(private_forested, outlayername)
+
+
+if __name__ == '__main__':
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    # iterate through the feature classes
+    for fc in list_jobs():
+        process(fc)
 
-t2 = time.time() # stop the total runtime timer
-secs = round(t2 - t1, 1)
-print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
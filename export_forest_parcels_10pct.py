@@ -9,50 +9,99 @@ This script runs through all feature layers in a geodatabase
 Filters out the feature classes that have the percent forest cover field
 Using those FCs, select the parcels that are >10% forested
 Save those as a new FC
+
+Several forest cover cutoffs (thresholds) are saved in one pass:  each county layer is
+read once with a search cursor, and every parcel is inserted into the layer of each
+cutoff it meets (ex: a parcel with 30% forest goes to the _10pct and _25pct layers).
+Adding a cutoff adds an output layer, not another scan of the county table.
+Output layers are named by the cutoff, ex: Parcels_Grand_privateforest_10pct.  The cutoffs
+are set in forest_thresholds.py
 '''
 
 import arcpy
+import contextlib
 import datetime
 import time
 
-print("starting")
-t1 = time.time() # start the timer to measure total runtime
+import forest_thresholds
+import gdb_lock
+import stage_timer
 
 # workspace must be set prior to listing feature classes
 input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
 arcpy.env.workspace = input_gdb
 
-# get all feature classes in the workspace
-fcs = arcpy.ListFeatureClasses(feature_type='polygon')  # returns a list of strings
-
-# only use the FCs that end with "privateforest"
-fcs = [fc for fc in fcs if fc[-13:] == "privateforest"]
 
-# iterate through the feature classes
-for fc in fcs:
-
-    print('\n', fc)
+def list_jobs():
+    '''Names of the private forest parcel layers.'''
+    # get all feature classes in the workspace
+    fcs = arcpy.ListFeatureClasses(feature_type='polygon')  # returns a list of strings
 
-    # select the private parcels
-    print("   selecting private parcels >10% forest cover")
+    # only use the FCs that end with "privateforest"
+    return [fc for fc in fcs if fc[-13:] == "privateforest"]
 
-    starttime = time.time()  # start the stopwatch
-    parcels_10 = arcpy.SelectLayerByAttribute_management(fc, "NEW_SELECTION", "Forest_Pct >= 10.0")
 
-    secs = round(time.time() - starttime, 1)
-    print("     done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+def threshold_layer(fc, cutoff):
+    '''Name of the output layer of a cutoff, ex: 10.0 -> "Parcels_Grand_privateforest_10pct"'''
+    return fc[:-len('_privateforest')] + forest_thresholds.threshold_suffix(cutoff)
 
 
-    # save the remaining features as a new layer
-    print("   saving output layer")
-    starttime = time.time()  # start the stopwatch
-
-    outlayername = fc + '_10pct'
-    arcpy.CopyFeatures_management(parcels_10, outlayername)
-
-    secs = round(time.time() - starttime, 1)
-    print("     done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+def process(fc):
+    '''Export the parcels of one private forest parcel layer at each forest cover cutoff, in one pass.'''
+    print('\n', fc)
 
-t2 = time.time() # stop the total runtime timer
-secs = round(t2 - t1, 1)
-print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+    cutoffs = sorted(forest_thresholds.thresholds)
+    message = "   saving private parcels with forest cover >= " + ", ".join('{:g}%'.format(c) for c in cutoffs)
+
+    with stage_timer.StageTimer(fc, 'threshold', message) as t:
+        t.features_in = lambda: int(arcpy.GetCount_management(fc)[0])
+
+        # attribute fields to copy (not the OBJECTID, shape, or shape length/area fields)
+        fields = [f.name for f in arcpy.ListFields(fc) if f.editable and f.type not in ('OID', 'Geometry', 'GlobalID')]
+        pct = [f.lower() for f in fields].index('forest_pct')
+
+        # empty output layers with the same fields as the county layer
+        # other county jobs add layers to the same geodatabase (run_counties_parallel.py)
+        spatial_reference = arcpy.Describe(fc).spatialReference
+        with gdb_lock.gdb_write_lock(input_gdb):
+            for cutoff in cutoffs:
+                outlayername = threshold_layer(fc, cutoff)
+                if arcpy.Exists(outlayername):
+                    arcpy.Delete_management(outlayername)
+                arcpy.CreateFeatureclass_management(input_gdb, outlayername, 'POLYGON', fc,
+                                                    spatial_reference=spatial_reference)
+
+        counts = [0] * len(cutoffs)
+        with contextlib.ExitStack() as stack:
+            cursors = [stack.enter_context(arcpy.da.InsertCursor(threshold_layer(fc, cutoff), ['SHAPE@'] + fields))
+                       for cutoff in cutoffs]
+            search = stack.enter_context(arcpy.da.SearchCursor(fc, ['SHAPE@'] + fields))
+
+            for row in search:
+                if row[1 + pct] is None:
+                    continue
+
+                # cutoffs are in ascending order, stop at the first one the parcel doesn't meet
+                for i, cutoff in enumerate(cutoffs):
+                    if row[1 + pct] < cutoff:
+                        break
+                    cursors[i].insertRow(row)
+                    counts[i] += 1
+
+        for cutoff, count in zip(cutoffs, counts):
+            print("     {:g}%:  {:,} parcels".format(cutoff, count))
+        t.features_out = sum(counts)
+
+
+if __name__ == '__main__':
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    # iterate through the feature classes
+    for fc in list_jobs():
+        process(fc)
+
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
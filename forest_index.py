@@ -0,0 +1,239 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+On-disk spatial index of the statewide forest pixel polygon layer
+(NLCD_2016_UT_Forest_polygon_NAD83utm12), built once and shared by every county job.
+
+Each county step otherwise searches the whole forest layer again, once in
+export_forest_parcels.py (SelectLayerByLocation) and again in intersect_forest_parcels.py.
+
+The index is a set of NumPy arrays saved in a folder, opened memory-mapped (read only),
+so any number of worker processes can use it at the same time without loading it:
+  fids.npy          OBJECTIDs of the forest polygons, sorted by grid cell
+  bounds.npy        bounding box of each polygon (xmin, ymin, xmax, ymax), same order
+  cell_offsets.npy  start of each grid cell in fids / bounds (row major), plus the end
+  large_fids.npy    polygons bigger than one grid cell, kept in a separate list
+  large_bounds.npy
+  index.json        grid origin and size, and the fingerprint of the forest layer
+
+A polygon is filed under the grid cell holding the lower left corner of its bounding box.
+Polygons no bigger than a cell can only reach into the next cell to the right or above, so
+a query checks the cells under the extent plus one cell to the left and below.
+
+The fingerprint is the feature count, extent, fields and coordinate system of the forest
+layer, and the size and modified time of its table files in the geodatabase
+(gdb_catalog.table_token), which change with any edit, geometry edits included.  The index
+is rebuilt by open_index() only when the fingerprint changes (or when rebuild=True).
+
+Worker processes opening an out of date index at the same time build it one at a time:
+the first one builds it under a lock file (<index folder>.lock), the others wait and then
+open the new index.  Building it before starting the workers (python forest_index.py) saves
+the wait.
+'''
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pyogrio
+import shapely
+
+import gdb_catalog
+import vector_intersect
+
+# grid cell size, in map units (meters)
+CELL_SIZE = 1000.0
+
+
+def layer_token(gdb, layer):
+    '''Size and modified time of the files of a layer:  its table files in a file geodatabase,
+    or the data file itself for other formats.
+    '''
+    try:
+        number = gdb_catalog.table_numbers(gdb).get(layer)
+    except (pyogrio.errors.DataSourceError, pyogrio.errors.DataLayerError):  # not a file geodatabase
+        number = None
+    if number is not None:
+        return gdb_catalog.table_token(gdb, number)
+
+    stat = os.stat(gdb)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def layer_fingerprint(gdb, layer):
+    '''Hash of the feature count, extent, fields and CRS of a layer, and the size and modified time of its files.'''
+    info = pyogrio.read_info(gdb, layer=layer, force_feature_count=True, force_total_bounds=True)
+    key = [info['features'], list(info['total_bounds']), list(info['fields']), info['geometry_type'], info['crs'],
+           layer_token(gdb, layer)]
+    return hashlib.sha1(json.dumps(key, default=str).encode()).hexdigest()
+
+
+def default_index_dir(gdb, layer):
+    '''Index folder next to the geodatabase, ex: Parcels_Utah_2020_index/<layer>'''
+    return os.path.join(os.path.splitext(gdb)[0] + '_index', layer)
+
+
+def build_index(gdb, layer, index_dir, cell_size=CELL_SIZE):
+    '''Build the index of a layer, and save it to index_dir.'''
+    # bounding boxes only, the polygons themselves are not read
+    fids, bounds = pyogrio.read_bounds(gdb, layer=layer)
+    bounds = bounds.T  # (n, 4)
+
+    xmin, ymin = bounds[:, 0].min(), bounds[:, 1].min()
+    ncols = int((bounds[:, 2].max() - xmin) // cell_size) + 1
+    nrows = int((bounds[:, 3].max() - ymin) // cell_size) + 1
+
+    width = bounds[:, 2] - bounds[:, 0]
+    height = bounds[:, 3] - bounds[:, 1]
+    large = (width > cell_size) | (height > cell_size)
+
+    # grid cell of the lower left corner, row major
+    cols = ((bounds[~large, 0] - xmin) // cell_size).astype('int64')
+    rows = ((bounds[~large, 1] - ymin) // cell_size).astype('int64')
+    cells = rows * ncols + cols
+
+    order = np.argsort(cells, kind='stable')
+    cell_offsets = np.searchsorted(cells[order], np.arange(nrows * ncols + 1))
+
+    # write to a new folder first, so a half-built index is never opened
+    tmp_dir = '{}_tmp{}'.format(index_dir, os.getpid())
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    np.save(os.path.join(tmp_dir, 'fids.npy'), fids[~large][order])
+    np.save(os.path.join(tmp_dir, 'bounds.npy'), bounds[~large][order])
+    np.save(os.path.join(tmp_dir, 'cell_offsets.npy'), cell_offsets)
+    np.save(os.path.join(tmp_dir, 'large_fids.npy'), fids[large])
+    np.save(os.path.join(tmp_dir, 'large_bounds.npy'), bounds[large])
+
+    meta = {
+        'layer': layer,
+        'fingerprint': layer_fingerprint(gdb, layer),
+        'xmin': float(xmin),
+        'ymin': float(ymin),
+        'cell_size': cell_size,
+        'ncols': ncols,
+        'nrows': nrows,
+        }
+    with open(os.path.join(tmp_dir, 'index.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    if os.path.exists(index_dir):
+        shutil.rmtree(index_dir)
+    os.rename(tmp_dir, index_dir)
+
+
+class ForestIndex:
+    '''Read-only, memory-mapped grid index of a polygon layer.'''
+
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, 'index.json')) as f:
+            self.meta = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(index_dir, name + '.npy'), mmap_mode='r')
+
+        self.fids = load('fids')
+        self.bounds = load('bounds')
+        self.cell_offsets = load('cell_offsets')
+        self.large_fids = load('large_fids')
+        self.large_bounds = load('large_bounds')
+
+    def _cell_range(self, x0, y0, x1, y1):
+        # grid rows and columns under an extent, plus one cell to the left and below
+        size = self.meta['cell_size']
+        c0 = max(int((x0 - self.meta['xmin']) // size) - 1, 0)
+        r0 = max(int((y0 - self.meta['ymin']) // size) - 1, 0)
+        c1 = min(int((x1 - self.meta['xmin']) // size), self.meta['ncols'] - 1)
+        r1 = min(int((y1 - self.meta['ymin']) // size), self.meta['nrows'] - 1)
+        return r0, r1, c0, c1
+
+    def _candidates(self, cell_ranges):
+        # every row of cells in a range is one contiguous slice of the sorted arrays
+        ncols = self.meta['ncols']
+        slices = set()
+        for r0, r1, c0, c1 in cell_ranges:
+            if c0 > c1:
+                continue
+            for row in range(r0, r1 + 1):
+                slices.add((self.cell_offsets[row * ncols + c0], self.cell_offsets[row * ncols + c1 + 1]))
+
+        idx = [np.arange(start, end) for start, end in sorted(slices) if end > start]
+        if not idx:
+            return np.empty(0, dtype='int64')
+        return np.unique(np.concatenate(idx))
+
+    def query(self, bounds):
+        '''OBJECTIDs of the polygons whose bounding box intersects bounds (xmin, ymin, xmax, ymax).'''
+        return self.query_boxes(np.asarray([bounds], dtype='float64'))
+
+    def query_boxes(self, boxes):
+        '''OBJECTIDs of the polygons whose bounding box intersects any of the boxes.
+
+        boxes is an (n, 4) array, for example the bounds of every parcel in a county,
+        so forest polygons between the parcels are left out.
+        '''
+        return self.query_boxes_bounds(boxes)[0]
+
+    def query_boxes_bounds(self, boxes):
+        '''OBJECTIDs and bounding boxes of the polygons found by query_boxes().  Returns (fids, (n, 4) bounds)'''
+        boxes = np.asarray(boxes, dtype='float64').reshape(-1, 4)
+        idx = self._candidates(self._cell_range(*box) for box in boxes)
+
+        # exact test of each candidate against each of the boxes (an STR-tree of the boxes)
+        tree = shapely.STRtree(shapely.box(*boxes.T))
+
+        out_fids = []
+        out_bounds = []
+        for fids, bounds in ((self.fids[idx], self.bounds[idx]), (self.large_fids, self.large_bounds)):
+            bounds = np.asarray(bounds)
+            candidate_idx, box_idx = tree.query(shapely.box(*bounds.T), predicate='intersects')
+            hit = np.unique(candidate_idx)
+            out_fids.append(np.asarray(fids[hit]))
+            out_bounds.append(bounds[hit])
+
+        fids, first = np.unique(np.concatenate(out_fids), return_index=True)
+        return fids, np.concatenate(out_bounds)[first]
+
+
+def index_current(gdb, layer, index_dir):
+    '''True if the index in index_dir was built from the layer as it is now.'''
+    meta_file = os.path.join(index_dir, 'index.json')
+    if not os.path.exists(meta_file):
+        return False
+    with open(meta_file) as f:
+        return json.load(f)['fingerprint'] == layer_fingerprint(gdb, layer)
+
+
+def open_index(gdb, layer, index_dir=None, rebuild=False):
+    '''Open the index of a layer, building it first if it is missing or out of date.'''
+    if index_dir is None:
+        index_dir = default_index_dir(gdb, layer)
+
+    if rebuild or not index_current(gdb, layer, index_dir):
+        # one process builds it, the others wait for the lock and find it up to date
+        os.makedirs(os.path.dirname(os.path.abspath(index_dir)), exist_ok=True)
+        with vector_intersect.gdb_write_lock(index_dir):
+            if rebuild or not index_current(gdb, layer, index_dir):
+                build_index(gdb, layer, index_dir)
+
+    return ForestIndex(index_dir)
+
+
+if __name__ == '__main__':
+
+    input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
+
+    # feature layer containing forest cover layer
+    forest = r'NLCD_2016_UT_Forest_polygon_NAD83utm12'
+
+    # build (or check) the index before starting the county jobs
+    index = open_index(input_gdb, forest)
+    print(forest, ':', len(index.fids) + len(index.large_fids), 'polygons indexed')
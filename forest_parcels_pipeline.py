@@ -0,0 +1,270 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+The whole forest parcel workflow for one county in a single pass, in place of
+running these scripts one after the other:
+  export_forest_parcels.py            -> Parcels_<County>_privateforest
+  add_acreages.py                     -> Parcel_Acres, Forest_Acres, Forest_pct fields
+  intersect_forest_parcels.py         -> Parcels_<County>_privateforest_intersect
+  calculate_summary_stats.py          -> Parcels_<County>_privateforest_intersect_summary
+  forestpct_join_copy_calculate.py    -> AddJoin / CalculateField / RemoveJoin
+  export_forest_parcels_10pct.py      -> Parcels_<County>_privateforest_10pct
+
+Each of those scripts writes its result to the geodatabase and the next one reads it
+back in full.  Here the county is read once, everything is done in memory, and only the
+final layers are written:
+1. read the private parcels (OWN_TYPE = private) and the forest polygons in the county extent
+2. intersect them (vector_intersect.py), sum the intersected forest acres per parcel
+3. keep the parcels with forest, calculate Parcel_Acres, Forest_Acres and Forest_pct, and
+   keep the OBJECTID of each parcel in the county layer in Parcel_OID
+4. save the private forest parcels, and the parcels >= each forest percent threshold
+   (forest_thresholds.py)
+
+Parcels that only touch a forest pixel along an edge are dropped in step 3, since they
+have no forested area.
+
+The intersect features and the summary table are only written when keep_intermediates
+is True (for checking the results against the step-by-step scripts).  Their
+FID_Parcels_<County>_privateforest field holds the OBJECTID of the county parcel, since the
+saved _privateforest layer is numbered 1..N:  join them on Parcel_OID.
+
+A county without private parcels, or without any over a threshold, gets empty output layers.
+
+With storage = 'parquet', the county parcels are read from, and the output layers written
+to, partitioned GeoParquet files next to the geodatabase (parquet_store.py) instead of the
+geodatabase.  Each county parcel layer is copied to its "parcels" partition the first time
+it is run; delete that partition when the county parcel layer changes.  The forest layer
+is always read from the geodatabase, and the intermediates are always written to it.
+
+When a county republishes its parcel layer, incremental_update.py recomputes only the
+parcels that changed since the last run, and patches the outputs.
+
+Run on its own, the reads and writes overlap the overlay of the other counties (overlap_io).
+Runs without arcpy, and works with run_counties_parallel.py (stage 'forest_parcels_pipeline')
+'''
+
+import contextlib
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.compute as pc
+
+import forest_index
+import forest_thresholds
+import measure
+import parquet_store
+import prefetch
+import stage_timer
+import vector_intersect
+
+input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
+
+# feature layer containing forest cover layer
+forest = r'NLCD_2016_UT_Forest_polygon_NAD83utm12'
+
+# read the forest polygons through the on-disk forest index (forest_index.py)
+use_forest_index = True
+
+# where the county parcels are read from and the outputs are written - valid:  gdb, parquet
+storage = 'gdb'
+
+# parquet folder, used when storage = 'parquet'
+parquet_dir = parquet_store.default_store(input_gdb)
+
+# when run on its own, read the next county and save the previous one in background threads,
+# while the current county is in the overlay (prefetch.py)
+overlap_io = True
+
+# also write the "_intersect" feature class and the "_intersect_summary" table
+keep_intermediates = False
+
+
+def list_jobs():
+    '''Names of the county parcel layers.'''
+    fcs = vector_intersect.list_polygon_layers(input_gdb)
+
+    # skip the forest cover layer, and the outputs of this and the step-by-step scripts
+    return [fc for fc in fcs if fc != forest and 'privateforest' not in fc]
+
+
+def intersect_forest(parcels, forest_polys, parcel_layer, keep_intermediates=False):
+    '''Intersect the parcels and the forest polygons.
+
+    Returns (position in parcels of each piece, acres of each piece, intersect features or None)
+    '''
+    privateforest = parcel_layer + '_privateforest'
+
+    if keep_intermediates:
+        pieces = vector_intersect.intersect_frames(parcels, forest_polys, privateforest, forest)
+        return parcels.index.get_indexer(pieces['FID_' + privateforest]), pieces['Forest_Acres'].values, pieces
+
+    parcel_idx, forest_idx, geoms, acres = vector_intersect.intersect_geometries(
+        parcels.geometry.values, forest_polys.geometry.values)
+    return parcel_idx, acres, None
+
+
+def summarize(parcel_idx, acres, n):
+    '''Sum of intersected forest acres, and number of pieces, of each of n parcels.'''
+    forest_acres = np.bincount(parcel_idx, weights=acres, minlength=n)
+    counts = np.bincount(parcel_idx, minlength=n)
+    return forest_acres, counts
+
+
+def forested_parcels(parcels, counts):
+    '''The parcels with at least one forest piece, with their OBJECTID in Parcel_OID.'''
+    out = parcels[counts > 0].copy()
+    out['Parcel_OID'] = out.index.values.astype('int32')  # the saved layers are numbered again from 1
+    return out
+
+
+def add_parcel_acres(out):
+    '''Calculate Parcel_Acres from the parcel geometries.'''
+    out['Parcel_Acres'] = measure.polygon_areas(out.geometry.values, 'acres')
+
+
+def join_forest_acres(out, forest_acres):
+    '''Copy the forest acres to the parcels, and calculate Forest_pct.'''
+    out['Forest_Acres'] = forest_acres
+    out['Forest_pct'] = out['Forest_Acres'] / out['Parcel_Acres'] * 100
+
+
+def forest_parcels(parcels, forest_polys, parcel_layer, keep_intermediates=False):
+    '''Calculate the forest acres and percent of the parcels that intersect forest.
+
+    parcels and forest_polys are GeoDataFrames indexed by OBJECTID.
+    parcel_layer is the name used for the FID_ field of the intermediates.
+
+    Returns (private forest parcels, intersect features or None, summary table or None)
+    '''
+    privateforest = parcel_layer + '_privateforest'
+
+    parcel_idx, acres, pieces = intersect_forest(parcels, forest_polys, parcel_layer, keep_intermediates)
+    forest_acres, counts = summarize(parcel_idx, acres, len(parcels))
+
+    out = forested_parcels(parcels, counts)
+    add_parcel_acres(out)
+    join_forest_acres(out, forest_acres[counts > 0])
+
+    summary = None
+    if keep_intermediates:
+        # same layout as the Statistics_analysis output
+        summary = pd.DataFrame({
+            'FID_' + privateforest: out.index.values.astype('int32'),
+            'FREQUENCY': counts[counts > 0],
+            'SUM_Forest_Acres': out['Forest_Acres'].values,
+            })
+
+    return out, pieces, summary
+
+
+def read_private_parcels(fc):
+    '''Read the private parcels of a county parcel layer, indexed by OBJECTID.'''
+    if storage == 'gdb':
+        # OGR SQL has no LOWER(), ILIKE is the case-insensitive match
+        with vector_intersect.gdb_read_lock(input_gdb):
+            return vector_intersect.read_layer(input_gdb, fc, where="OWN_TYPE ILIKE 'private'")
+
+    county = parquet_store.county_name(fc)
+    if not parquet_store.has_partition(parquet_dir, 'parcels', county):
+        parquet_store.import_layer(input_gdb, fc, parquet_dir)
+
+    # the filter is applied while reading, rows of other owners are never turned into geometries
+    private = pc.utf8_lower(pc.field('OWN_TYPE')) == 'private'
+    return parquet_store.read_partition(parquet_dir, 'parcels', county, filters=private)
+
+
+def save_layer(df, fc, suffix):
+    '''Save an output layer of a county parcel layer, ex: suffix "_privateforest"'''
+    if storage == 'gdb':
+        vector_intersect.write_layer(df, input_gdb, fc + suffix)
+    else:
+        # dataset name without the leading "_", ex: "privateforest_10pct"
+        parquet_store.write_partition(df, parquet_dir, suffix[1:], parquet_store.county_name(fc))
+
+
+def save_thresholds(out, fc):
+    '''Save the parcels >= each forest percent threshold, one layer each.'''
+    for threshold in forest_thresholds.thresholds:
+        save_layer(out[out['Forest_pct'] >= threshold], fc, forest_thresholds.threshold_suffix(threshold))
+
+
+def select_county(fc):
+    '''Private parcels of a county, and the forest polygons near them.  Returns (parcels, forest_polys)'''
+    index = forest_index.open_index(input_gdb, forest) if use_forest_index else None
+    parcels = read_private_parcels(fc)
+
+    # the output layers of other counties are written to the same geodatabase (by the writer
+    # thread of prefetch.py, or other county jobs), don't read it while one is being added.
+    # The reads of other counties go on at the same time.  With parquet storage only the
+    # intermediates are written to the geodatabase
+    if storage == 'gdb' or keep_intermediates:
+        lock = vector_intersect.gdb_read_lock(input_gdb)
+    else:
+        lock = contextlib.nullcontext()
+    with lock:
+        forest_polys = vector_intersect.read_forest(input_gdb, forest, parcels, index)
+
+    return parcels, forest_polys
+
+
+def read_county(fc):
+    '''Read the private parcels of a county, and the forest polygons near them.'''
+    with stage_timer.StageTimer(fc, 'read', "   reading private parcels and forest pixels:  " + fc) as t:
+        parcels, forest_polys = select_county(fc)
+        t.features_out = len(parcels)
+
+    return parcels, forest_polys
+
+
+def overlay(fc, data):
+    '''Intersect and calculate the forest percent of a county read by read_county().'''
+    parcels, forest_polys = data
+    message = "   intersecting and calculating forest percent:  " + fc
+    with stage_timer.StageTimer(fc, 'overlay', message, len(parcels)) as t:
+        result = forest_parcels(parcels, forest_polys, fc, keep_intermediates)
+        t.features_out = len(result[0])
+
+    return result
+
+
+def save_county(fc, result):
+    '''Save the output layers of a county from overlay().'''
+    out, pieces, summary = result
+    with stage_timer.StageTimer(fc, 'save', "   saving output layers:  " + fc, len(out)):
+        save_layer(out, fc, '_privateforest')
+        save_thresholds(out, fc)
+
+        if keep_intermediates:
+            outlayername = fc + '_privateforest'
+            vector_intersect.write_layer(pieces, input_gdb, outlayername + '_intersect')
+            vector_intersect.write_layer(summary, input_gdb, outlayername + '_intersect_summary')
+
+
+def process(fc):
+    '''Run the whole forest parcel workflow for one county parcel layer.'''
+    print('\n', fc)
+    save_county(fc, overlay(fc, read_county(fc)))
+
+
+if __name__ == '__main__':
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    if overlap_io:
+        # read the next county and save the last one while the current one is in the overlay
+        prefetch.run_pipelined(list_jobs(), read_county, overlay, save_county)
+    else:
+        # iterate through the county parcel layers
+        for fc in list_jobs():
+            process(fc)
+
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
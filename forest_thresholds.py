@@ -0,0 +1,28 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Percent forest cover cutoffs of the threshold layers, set once for every script that
+writes or reads them:
+  export_forest_parcels_10pct.py   step-by-step threshold step (arcpy)
+  forest_parcels_pipeline.py       single pass workflow
+  incremental_update.py            patched outputs
+  merge_statewide.py               statewide layers
+  run_manifest.py                  output of the threshold step
+
+Each cutoff has its own output layer per county, named by the cutoff,
+ex: 10 -> Parcels_Grand_privateforest_10pct
+
+No imports, so it loads in ArcGIS Pro and without arcpy.
+'''
+
+# percent forest cover cutoffs, one output layer each
+thresholds = [10.0, 25.0, 50.0, 75.0]
+
+
+def threshold_suffix(cutoff):
+    '''Suffix of the output layer of a cutoff, ex: 10.0 -> "_privateforest_10pct"'''
+    return '_privateforest_{:g}pct'.format(cutoff)
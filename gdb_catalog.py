@@ -0,0 +1,159 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Saved catalog of the datasets in a geodatabase, so the scripts don't have to describe
+every layer again on each run (ListFeatureClasses, Describe, ListFields, GetCount).
+
+For every feature class and table, the catalog has:
+  geometry_type  Polygon, MultiPolygon, ... (None for tables)
+  features       feature / row count
+  vertices       number of vertices of all the geometries
+  extent         xmin, ymin, xmax, ymax
+  fields         [name, type] of each field
+  crs
+  token          size and modified time of the dataset's table files
+
+The catalog is a JSON file next to the geodatabase (Parcels_Utah_2020_catalog.json).
+refresh() only describes the datasets that changed since the catalog was saved:  each
+dataset of a file geodatabase is its own table file (a<number>.gdbtable, numbered by its
+row in GDB_SystemCatalog), and a dataset is described again when the size or modified
+time of its files changed.  Counting the vertices reads all of the geometries, so the
+first refresh of a geodatabase takes a while, the next ones only seconds.  refresh(gdb, names)
+only looks at the named datasets, so the outputs the steps rewrite on every run (and the
+county layers themselves, when zonal_forest_acres.py adds its fields) are only described
+again when they are asked for.
+
+Used by job_scheduler.py to estimate the cost of each county job.
+
+Runs without arcpy (pyogrio, Shapely 2)
+'''
+
+import json
+import os
+
+import pyogrio
+import shapely
+
+input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
+
+# rows per batch when counting vertices
+batch_size = 50000
+
+
+def catalog_path(gdb):
+    '''Catalog file next to the geodatabase, ex: Parcels_Utah_2020_catalog.json'''
+    return os.path.splitext(gdb.rstrip('\\/'))[0] + '_catalog.json'
+
+
+def table_numbers(gdb):
+    '''Number of the table file of each dataset:  {name: number}, without the GDB_ system tables.'''
+    catalog = pyogrio.read_dataframe(gdb, layer='GDB_SystemCatalog', fid_as_index=True)
+    return dict((name, int(number)) for number, name in catalog['Name'].items() if not name.startswith('GDB_'))
+
+
+def table_token(gdb, number):
+    '''Size and modified time of a dataset's table files, changes whenever the dataset is edited.'''
+    token = []
+    for ext in ('.gdbtable', '.gdbtablx'):
+        path = os.path.join(gdb, 'a{:08x}{}'.format(number, ext))
+        if os.path.exists(path):
+            stat = os.stat(path)
+            token += [stat.st_size, stat.st_mtime_ns]
+    return token
+
+
+def count_vertices(gdb, name):
+    '''Number of vertices of all the geometries of a feature class, read in batches.'''
+    vertices = 0
+    with pyogrio.raw.open_arrow(gdb, layer=name, columns=[], batch_size=batch_size, use_pyarrow=True) as (meta, reader):
+        geometry_name = meta['geometry_name'] or 'wkb_geometry'
+        for batch in reader:
+            geoms = shapely.from_wkb(batch.column(geometry_name).to_numpy(zero_copy_only=False))
+            vertices += int(shapely.get_num_coordinates(geoms).sum())
+    return vertices
+
+
+def describe(gdb, name):
+    '''Catalog entry of one dataset.'''
+    info = pyogrio.read_info(gdb, layer=name)
+    geometry_type = info['geometry_type']
+
+    return {
+        'geometry_type': geometry_type,
+        'features': int(info['features']),
+        'vertices': count_vertices(gdb, name) if geometry_type else 0,
+        'extent': list(info['total_bounds']) if geometry_type else None,
+        'fields': [[field, ogr_type] for field, ogr_type in zip(info['fields'], info['ogr_types'])],
+        'crs': info['crs'],
+        }
+
+
+def load(gdb):
+    '''Saved catalog of a geodatabase:  {name: entry}, empty if there is none.'''
+    path = catalog_path(gdb)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(gdb, catalog):
+    '''Save the catalog of a geodatabase, replacing the last one.'''
+    path = catalog_path(gdb)
+
+    # write a new file, then swap it in, so a reader never sees a half-written catalog
+    with open(path + '.tmp', 'w') as f:
+        json.dump(catalog, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def refresh(gdb, names=None):
+    '''Catalog of a geodatabase, describing only the datasets that changed since it was saved.
+
+    With names, only those datasets are checked and described, the other entries are left
+    as they were saved.  Returns {name: entry}
+    '''
+    catalog = load(gdb)
+    numbers = table_numbers(gdb)
+    changed = False
+
+    for name in list(catalog):
+        if name not in numbers:  # deleted
+            del catalog[name]
+            changed = True
+
+    for name, number in numbers.items():
+        if names is not None and name not in names:
+            continue
+        token = table_token(gdb, number)
+        if name in catalog and catalog[name]['token'] == token:
+            continue
+
+        entry = describe(gdb, name)
+        entry['token'] = token
+        catalog[name] = entry
+        changed = True
+
+    if changed:
+        save(gdb, catalog)
+
+    return catalog
+
+
+def feature_classes(catalog, geometry_types=('Polygon', 'MultiPolygon')):
+    '''Names of the feature classes of a catalog, equivalent of arcpy.ListFeatureClasses(feature_type='polygon')'''
+    return sorted(name for name, entry in catalog.items() if entry['geometry_type'] in geometry_types)
+
+
+if __name__ == '__main__':
+
+    # print the catalog, largest datasets first
+    catalog = refresh(input_gdb)
+    for name in sorted(catalog, key=lambda name: catalog[name]['vertices'], reverse=True):
+        entry = catalog[name]
+        print("{:<50}{:<14}{:>12,} features{:>14,} vertices".format(
+            name, entry['geometry_type'] or 'table', entry['features'], entry['vertices']))
@@ -0,0 +1,89 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Locks on a file geodatabase shared by parallel county jobs (run_counties_parallel.py,
+job_queue.py), for the pyogrio writes of vector_intersect.py and the arcpy tools that add,
+delete or change layers (export_forest_parcels.py, intersect_forest_parcels.py, ...).
+
+No imports besides the standard library, so it loads in ArcGIS Pro and without arcpy.
+'''
+
+import contextlib
+import glob
+import os
+import time
+import uuid
+
+# a write lock older than this (seconds) was left by a process that died, and is removed
+LOCK_TIMEOUT = 3600
+
+
+def _remove_stale(path):
+    # remove a lock file left by a process that died
+    try:
+        if time.time() - os.path.getmtime(path) > LOCK_TIMEOUT:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@contextlib.contextmanager
+def gdb_write_lock(gdb):
+    '''Only one process at a time writes to a geodatabase, and not while it is being read.
+
+    Each new layer is added to the geodatabase's list of tables, and two processes adding
+    layers at the same time (county jobs in run_counties_parallel.py) can lose one of them.
+    A read opening the geodatabase during a write can see that list half written, so the
+    write also waits for the reads holding gdb_read_lock to finish.
+    The lock is a file next to the geodatabase (<gdb>.lock).
+    '''
+    path = gdb.rstrip('\\/') + '.lock'
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            _remove_stale(path)
+            time.sleep(0.1)
+    try:
+        # new reads wait for the lock, the reads already started are let finish
+        while True:
+            readers = glob.glob(glob.escape(path) + '.read.*')
+            if not readers:
+                break
+            for reader in readers:
+                _remove_stale(reader)
+            time.sleep(0.1)
+        yield
+    finally:
+        os.close(fd)
+        os.remove(path)
+
+
+@contextlib.contextmanager
+def gdb_read_lock(gdb):
+    '''Read a geodatabase that other jobs may be writing to (the writer thread of prefetch.py,
+    other county jobs).
+
+    Any number of reads hold the lock at the same time, in any process, only gdb_write_lock
+    waits for them.  Each read is a file next to the geodatabase (<gdb>.lock.read.<id>).
+    '''
+    path = gdb.rstrip('\\/') + '.lock'
+    reader = '{}.read.{}'.format(path, uuid.uuid4().hex)
+    while True:
+        while os.path.exists(path):
+            _remove_stale(path)
+            time.sleep(0.1)
+        os.close(os.open(reader, os.O_CREAT | os.O_WRONLY))
+        if not os.path.exists(path):
+            break
+        # a write took the lock at the same time, let it go first
+        os.remove(reader)
+    try:
+        yield
+    finally:
+        os.remove(reader)
@@ -0,0 +1,201 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Makes a generalized copy of the forest pixel polygon layer, to use in place of
+NLCD_2016_UT_Forest_polygon_NAD83utm12 in the select and intersect steps.
+
+The forest layer is polygonized from the 30m NLCD raster, so its polygons are single
+pixels or pixel clusters with a vertex at every 30m step of their staircase edges.  Every
+overlay pays for each of those vertices and polygons.
+
+1. dissolve:  touching forest pixels are merged into one polygon (coverage union, the
+   pixels share edges and don't overlap)
+2. exact generalization:  the vertices in the middle of straight runs of pixel edges are
+   removed.  Only exactly collinear vertices are dropped, so the shape and area don't change
+3. simplification (optional, simplify_tolerance > 0):  the staircase edges are simplified
+   within the tolerance.  The polygons of a tile are simplified together as a coverage
+   (shapely.coverage_simplify), so an edge shared by two polygons is simplified the same
+   way for both, and they don't overlap.  Polygons in different tiles are simplified apart,
+   and can overlap along the tile edges, where the overlap would be counted twice in the
+   Forest_Acres of a parcel.  The simplification changes the forest area, so the area of
+   the symmetric difference between the exact and simplified polygons, plus the area where
+   simplified polygons overlap, is reported, and the layer is not saved if it is more than
+   max_area_error of the forest area
+
+The layer is processed in square tiles of the grid (the polygons are assigned to the tile
+holding the lower left corner of their bounding box), so only one tile of the pixel polygons
+is in memory at a time.  The dissolved output is much smaller, and is saved at the end,
+once the area error is known to be within the budget.  Polygons are not merged across tile
+edges, which leaves a seam every tile_size meters but doesn't change any area.
+
+The output is saved as "NLCD_2016_UT_Forest_polygon_NAD83utm12_generalized".  Set forest
+to that layer name in forest_parcels_pipeline.py, intersect_forest_parcels.py or
+export_forest_parcels.py to use it.  The printed report has the polygon and vertex counts
+before and after.
+
+Runs without arcpy (pyogrio, Shapely 2)
+'''
+
+import datetime
+import time
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyogrio
+import shapely
+
+import stage_timer
+import vector_intersect
+
+input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
+
+# feature layer containing forest cover layer
+forest = r'NLCD_2016_UT_Forest_polygon_NAD83utm12'
+
+# output layer
+out_layer = forest + '_generalized'
+
+# pixels with different values of this field are kept apart (ex: 'gridcode' for the
+# NLCD forest classes), None = dissolve all forest pixels together
+dissolve_field = None
+
+# tile size, in map units (meters)
+tile_size = 20000.0
+
+# tolerance of the optional simplification, in meters, 0 = exact generalization only.
+# Roughly the square root of the area of the corners removed (Visvalingam-Whyatt):  a 30m
+# pixel step is about 21, so smaller tolerances leave the staircase edges as they are
+simplify_tolerance = 0.0
+
+# largest area error allowed for the simplification, as a fraction of the forest area
+max_area_error = 0.001
+
+
+def tile_fids(gdb, layer, size):
+    '''OBJECTIDs of the polygons in each tile:  {(col, row): array of OBJECTIDs}'''
+    # bounding boxes only, the polygons themselves are not read
+    fids, bounds = pyogrio.read_bounds(gdb, layer=layer)
+    cols = np.floor(bounds[0] / size).astype('int64')
+    rows = np.floor(bounds[1] / size).astype('int64')
+
+    order = np.lexsort((cols, rows))
+    keys = np.stack([cols[order], rows[order]], axis=1)
+    starts = np.flatnonzero(np.r_[True, (np.diff(keys, axis=0) != 0).any(axis=1)])
+    ends = np.r_[starts[1:], len(order)]
+
+    return dict((tuple(keys[s]), fids[order[s:e]]) for s, e in zip(starts, ends))
+
+
+def dissolve(geoms):
+    '''Merge a coverage of pixel polygons (shared edges, no overlaps) into one polygon per touching group.'''
+    return shapely.get_parts(shapely.coverage_union_all(geoms))
+
+
+def generalize(coverage, tolerance=0.0):
+    '''Remove the collinear vertices of a coverage of polygons, or simplify it within the tolerance.
+
+    With a tolerance, the polygons are simplified together (Shapely 2.1, GEOS 3.12), so the
+    edges they share stay shared and the polygons don't overlap.
+    '''
+    if tolerance > 0:
+        return shapely.coverage_simplify(coverage, tolerance)
+
+    # a tolerance of 0 only removes vertices with no offset from the line, the area is unchanged
+    return shapely.simplify(coverage, 0.0)
+
+
+def overlap_area(geoms):
+    '''Total area where polygons of an array overlap each other.'''
+    tree = shapely.STRtree(geoms)
+    left, right = tree.query(geoms, predicate='intersects')
+    pairs = left < right  # each pair once, and not a polygon with itself
+    return shapely.area(shapely.intersection(geoms[left[pairs]], geoms[right[pairs]])).sum()
+
+
+def generalize_layer(gdb, layer, output, tolerance=0.0, size=tile_size):
+    '''Write the generalized copy of a forest pixel layer.  Returns the report as a dict.'''
+    report = dict.fromkeys(['polygons_in', 'vertices_in', 'polygons_out', 'vertices_out'], 0)
+    report.update(area=0.0, area_out=0.0, area_error=0.0, overlap=0.0)
+
+    frames = []
+    for key, fids in sorted(tile_fids(gdb, layer, size).items()):
+        columns = [dissolve_field] if dissolve_field else []
+        tile = vector_intersect.read_layer(gdb, layer, columns=columns, fids=fids)
+        groups = tile.groupby(dissolve_field) if dissolve_field else [(None, tile)]
+
+        # the dissolved polygons of all groups of the tile are one coverage, generalized together
+        merged = []
+        values = []
+        for value, group in groups:
+            polygons = dissolve(group.geometry.values)
+            merged.append(polygons)
+            values += [value] * len(polygons)
+        merged = np.concatenate(merged)
+        out = generalize(merged, tolerance)
+
+        geoms = tile.geometry.values
+        report['polygons_in'] += len(geoms)
+        report['vertices_in'] += int(shapely.get_num_coordinates(geoms).sum())
+        report['polygons_out'] += len(out)
+        report['vertices_out'] += int(shapely.get_num_coordinates(out).sum())
+        report['area'] += shapely.area(merged).sum()
+        report['area_out'] += shapely.area(out).sum()
+        if tolerance > 0:
+            report['area_error'] += shapely.area(shapely.symmetric_difference(merged, out)).sum()
+
+        df = gpd.GeoDataFrame(geometry=out, crs=tile.crs)
+        if dissolve_field:
+            df[dissolve_field] = values
+        frames.append(df)
+
+    out = pd.concat(frames, ignore_index=True)
+
+    if tolerance > 0:
+        # simplified polygons of neighbouring tiles can overlap along the tile edges
+        report['overlap'] = overlap_area(out.geometry.values)
+
+    error = report['area_error'] + report['overlap']
+    if report['area'] and error / report['area'] > max_area_error:
+        raise ValueError('simplification area error {:.3%} is over the budget of {:.3%}, {} not saved'.format(
+            error / report['area'], max_area_error, output))
+
+    vector_intersect.write_layer(out, gdb, output)
+
+    return report
+
+
+def print_report(report):
+    '''Print the polygon and vertex counts and the forest area, before and after.'''
+    print("   polygons:  {:,} -> {:,}".format(report['polygons_in'], report['polygons_out']))
+    print("   vertices:  {:,} -> {:,}  ({:.1f} times fewer)".format(
+        report['vertices_in'], report['vertices_out'], report['vertices_in'] / max(report['vertices_out'], 1)))
+    print("   forest area:  {:,.1f} -> {:,.1f} acres".format(
+        report['area'] / vector_intersect.SQ_METERS_PER_ACRE, report['area_out'] / vector_intersect.SQ_METERS_PER_ACRE))
+    if report['area_error']:
+        print("   simplification area error:  {:,.1f} acres ({:.3%})".format(
+            report['area_error'] / vector_intersect.SQ_METERS_PER_ACRE, report['area_error'] / report['area']))
+        print("   overlap of simplified polygons:  {:,.1f} acres ({:.3%})".format(
+            report['overlap'] / vector_intersect.SQ_METERS_PER_ACRE, report['overlap'] / report['area']))
+
+
+if __name__ == '__main__':
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    print('\n', forest)
+    with stage_timer.StageTimer(forest, 'generalize', "   dissolving forest pixels, removing collinear vertices") as t:
+        report = generalize_layer(input_gdb, forest, out_layer, simplify_tolerance)
+        t.features_in = report['polygons_in']
+        t.features_out = report['polygons_out']
+
+    print_report(report)
+
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
@@ -0,0 +1,260 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Updates the forest parcel outputs of a county when the county republishes its parcel
+layer, without running the whole county again.  Most years only a few percent of the
+parcels are split, merged or change owner, and only those are recomputed.
+
+1. diff:  every parcel of the new Parcels_<County> layer is hashed (its attributes and
+   WKB geometry, read as Arrow, no geometries are built), and compared by parcel key with
+   the snapshot of hashes saved by the last run
+     added      key not in the snapshot
+     changed    key in the snapshot with a different hash (new shape, owner, any field)
+     removed    key in the snapshot, not in the new layer
+     unchanged  same key and hash
+2. recompute:  only the added and changed parcels are read, filtered to OWN_TYPE = private,
+   intersected with the forest and given their Parcel_Acres, Forest_Acres and Forest_pct
+   (forest_parcels_pipeline.forest_parcels)
+3. patch:  the rows of the previous _privateforest output for the unchanged parcels are kept
+   as they are, the rows of changed and removed parcels are dropped, and the recomputed
+   parcels are added.  The _privateforest layer and the threshold layers are saved from the
+   patched rows, and the new snapshot is saved last
+
+The patched layers are written whole (pyogrio can't delete or update single features), but
+only the changed parcels go through the overlay, which is where the time goes.  The kept
+rows get the OBJECTIDs of the new parcel layer, so the output matches a full run.
+
+Parcel key:  key_field, the county parcel ID.  Parcels sharing a key (condos, split parcels
+not yet renumbered), or without one, can't be matched and are always recomputed.  A parcel
+redrawn with the same shape but starting at another vertex hashes as changed, which only
+costs its recompute.
+
+A full run (forest_parcels_pipeline.process) is done, and the snapshot saved, when there is
+no snapshot or previous output, or when the forest layer changed since the snapshot was
+made.  The snapshot records the forest layer's fingerprint (forest_index.layer_fingerprint,
+which changes with any edit of the layer, even one rebuilt under the same name).  Delete
+the county's snapshot to force a full run.
+
+Uses the storage setting of forest_parcels_pipeline.py (gdb or parquet).
+Runs without arcpy, and works with run_counties_parallel.py (stage 'incremental_update')
+'''
+
+import datetime
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyogrio
+
+import forest_index
+import forest_parcels_pipeline
+import parquet_store
+import stage_timer
+import vector_intersect
+
+input_gdb = forest_parcels_pipeline.input_gdb
+
+# feature layer containing forest cover layer
+forest = forest_parcels_pipeline.forest
+
+# field with the county parcel ID, used to match the parcels of two years
+key_field = 'PARCEL_ID'
+
+# folder for the snapshots of parcel hashes, one file per county, next to the geodatabase
+snapshot_dir = os.path.splitext(input_gdb)[0] + '_snapshots'
+
+
+def list_jobs():
+    '''Names of the county parcel layers.'''
+    return forest_parcels_pipeline.list_jobs()
+
+
+def snapshot_path(fc):
+    return os.path.join(snapshot_dir, fc + '.parquet')
+
+
+def layer_hashes(gdb, fc, key=key_field):
+    '''Hash of every parcel of a layer:  DataFrame of key, hash (uint64) and OBJECTID.'''
+    meta, table = pyogrio.read_arrow(gdb, layer=fc, return_fids=True)
+    df = table.to_pandas()
+
+    if key not in df.columns:
+        raise ValueError('{} has no {} field to match the parcels by'.format(fc, key))
+    oids = df.pop(meta['fid_column'] or 'OBJECTID').values
+
+    # attributes and WKB geometry together, one 64 bit hash per row
+    hashes = pd.util.hash_pandas_object(df, index=False).values
+
+    return pd.DataFrame({'key': df[key].values, 'hash': hashes, 'OBJECTID': oids})
+
+
+def read_snapshot(fc, forest_fingerprint):
+    '''Snapshot of the last run of a county, or None if there is none or the forest layer changed since.'''
+    path = snapshot_path(fc)
+    if not os.path.exists(path):
+        return None
+
+    table = pq.read_table(path)
+    metadata = table.schema.metadata or {}
+    if metadata.get(b'forest', b'').decode() != forest or \
+       metadata.get(b'forest_fingerprint', b'').decode() != forest_fingerprint:
+        return None
+    return table.to_pandas()
+
+
+def write_snapshot(fc, snapshot, forest_fingerprint):
+    '''Save the parcel hashes of a county, replacing the last snapshot.'''
+    path = snapshot_path(fc)
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    table = pa.Table.from_pandas(snapshot, preserve_index=False)
+    table = table.replace_schema_metadata({'forest': forest, 'forest_fingerprint': forest_fingerprint})
+
+    # write a new file, then swap it in, so a failed run never leaves a half-written snapshot
+    pq.write_table(table, path + '.tmp', compression='zstd')
+    os.replace(path + '.tmp', path)
+
+
+def unique_keys(snapshot):
+    '''Rows of a snapshot whose key is not null and appears only once, indexed by key.'''
+    keys = snapshot['key']
+    return snapshot[keys.notna() & ~keys.duplicated(keep=False)].set_index('key')
+
+
+def diff_snapshots(old, new):
+    '''Compare the snapshot of the last run with the hashes of the new layer.
+
+    Returns (keys of the unchanged parcels, OBJECTIDs of the new layer to recompute,
+    counts of added, changed, removed and unchanged parcels)
+    '''
+    old_unique = unique_keys(old)
+    new_unique = unique_keys(new)
+
+    both = old_unique.index.intersection(new_unique.index)
+    unchanged = both[old_unique.loc[both, 'hash'].values == new_unique.loc[both, 'hash'].values]
+
+    recompute = new.loc[~new['key'].isin(unchanged), 'OBJECTID'].values
+
+    old_keys = set(old['key'].dropna())
+    new_keys = set(new['key'].dropna())
+    counts = {
+        'added': len(new_keys - old_keys),
+        'changed': len(old_keys & new_keys) - len(unchanged),
+        'removed': len(old_keys - new_keys),
+        'unchanged': len(unchanged),
+        }
+
+    return unchanged, recompute, counts
+
+
+def read_previous(fc):
+    '''Read the previous _privateforest output of a county, or None if there is none.'''
+    if forest_parcels_pipeline.storage == 'gdb':
+        if fc + '_privateforest' not in pyogrio.list_layers(input_gdb)[:, 0]:
+            return None
+        return vector_intersect.read_layer(input_gdb, fc + '_privateforest')
+
+    county = parquet_store.county_name(fc)
+    if not parquet_store.has_partition(forest_parcels_pipeline.parquet_dir, 'privateforest', county):
+        return None
+    return parquet_store.read_partition(forest_parcels_pipeline.parquet_dir, 'privateforest', county)
+
+
+def recompute_parcels(fc, oids):
+    '''Forest acres and percent of the private parcels among the given OBJECTIDs of a county layer.
+
+    Returns None if none of them are private.
+    '''
+    if len(oids) == 0:
+        return None
+    parcels = vector_intersect.read_layer(input_gdb, fc, fids=oids)
+    parcels = parcels[parcels['OWN_TYPE'].str.lower() == 'private']
+    if len(parcels) == 0:
+        return None
+
+    index = forest_index.open_index(input_gdb, forest) if forest_parcels_pipeline.use_forest_index else None
+    forest_polys = vector_intersect.read_forest(input_gdb, forest, parcels, index)
+
+    out, pieces, summary = forest_parcels_pipeline.forest_parcels(parcels, forest_polys, fc)
+    return out
+
+
+def patch(previous, unchanged, new, recomputed, key=key_field):
+    '''Previous output rows of the unchanged parcels, with their new OBJECTIDs, plus the recomputed parcels.'''
+    kept = previous[previous[key].isin(unchanged)].copy()
+
+    # OBJECTIDs of the unchanged parcels in the new layer
+    new_oids = unique_keys(new)['OBJECTID']
+    kept.index = pd.Index(new_oids.loc[kept[key].values].values, name=previous.index.name)
+    kept['Parcel_OID'] = kept.index.values.astype('int32')
+
+    if recomputed is None:
+        return kept.sort_index()
+    # the fields of a full run:  fields only in the previous output (ex: added by hand) are dropped,
+    # and fields new to the county layer are empty in the kept rows
+    out = pd.concat([kept.reindex(columns=recomputed.columns), recomputed])
+    return out.sort_index()
+
+
+def save_outputs(fc, out):
+    '''Save the _privateforest layer and the threshold layers of a county.'''
+    forest_parcels_pipeline.save_layer(out, fc, '_privateforest')
+    forest_parcels_pipeline.save_thresholds(out, fc)
+
+
+def process(fc):
+    '''Update the forest parcel outputs of a county parcel layer, recomputing only the parcels that changed.'''
+    print('\n', fc)
+
+    with stage_timer.StageTimer(fc, 'diff', "   hashing parcels and comparing with the last run") as t:
+        new = layer_hashes(input_gdb, fc)
+        forest_fingerprint = forest_index.layer_fingerprint(input_gdb, forest)
+        old = read_snapshot(fc, forest_fingerprint)
+        previous = read_previous(fc) if old is not None else None
+        t.features_in = len(new)
+
+    if forest_parcels_pipeline.storage == 'parquet':
+        # the parcels partition is a copy of the county layer, replace it with the new one
+        parquet_store.import_layer(input_gdb, fc, forest_parcels_pipeline.parquet_dir)
+
+    if old is None or previous is None:
+        print("   no snapshot or previous output, or the forest layer changed, running the whole county")
+        forest_parcels_pipeline.process(fc)
+        write_snapshot(fc, new, forest_fingerprint)
+        return
+
+    unchanged, recompute, counts = diff_snapshots(old, new)
+    print("   {added:,} added, {changed:,} changed, {removed:,} removed, {unchanged:,} unchanged parcels".format(**counts))
+
+    message = "   intersecting and calculating forest percent of the added and changed parcels"
+    with stage_timer.StageTimer(fc, 'overlay', message, len(recompute)) as t:
+        recomputed = recompute_parcels(fc, recompute)
+        t.features_out = 0 if recomputed is None else len(recomputed)
+
+    with stage_timer.StageTimer(fc, 'patch', "   patching output layers", len(previous)) as t:
+        out = patch(previous, unchanged, new, recomputed)
+        save_outputs(fc, out)
+        t.features_out = len(out)
+
+    # saved last, so an update that fails partway through is diffed again on the next run
+    write_snapshot(fc, new, forest_fingerprint)
+
+
+if __name__ == '__main__':
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    # iterate through the county parcel layers
+    for fc in list_jobs():
+        process(fc)
+
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
@@ -20,55 +20,127 @@ of the forested polygon layer, in order to calcuate the percentage of the origia
 that is covered by forest pixels.
 
 https://pro.arcgis.com/en/pro-app/tool-reference/analysis/intersect.htm
+
+Intersect engine:
+  arcpy    - Intersect_analysis, then CalculateField for the acreage (ArcGIS Pro).  Both
+             run in a scratch geodatabase of the worker process, and the output is copied
+             to the geodatabase at the end, so parallel county jobs only hold the write lock
+             (gdb_lock.py) for the copy
+  shapely  - in-process vectorized intersect from vector_intersect.py.  The acreage
+             is calculated in the same step, and no arcpy license is needed (Linux)
+
+Tiled mode (shapely engine, tiled = True):  counties are intersected one tile at a time
+(tiled_intersect.py), with tiles sized so a tile fits in memory_budget_mb.  Use it for the
+largest counties, the peak memory no longer grows with the size of the county.
 '''
 
 
-import arcpy
 import datetime
+import os
+import tempfile
 import time
 
-print("starting")
-t1 = time.time() # start the timer to measure total runtime
+import stage_timer
 
-# workspace must be set prior to listing feature classes
 input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
-arcpy.env.workspace = input_gdb
 
 # feature layer containing forest cover layer (select_features layer)
 forest = r'NLCD_2016_UT_Forest_polygon_NAD83utm12'
 
-# get all feature class names in the workspace, as a list of strings
-fcs = arcpy.ListFeatureClasses(feature_type='polygon')
+# intersect engine - valid:  arcpy, shapely
+engine = 'arcpy'
+
+if engine == 'arcpy':
+    import arcpy
+    import gdb_lock
+    import tile_forest_layer
+
+    # workspace must be set prior to listing feature classes
+    arcpy.env.workspace = input_gdb
+
+elif engine == 'shapely':
+    import forest_index
+    import tiled_intersect
+    import vector_intersect
+
+# shapely engine:  intersect one tile at a time, within a memory budget (MB)
+tiled = False
+memory_budget_mb = 2000
+
+
+def list_jobs():
+    '''Names of the private forest parcel layers to intersect.'''
+    # get all feature class names in the workspace, as a list of strings
+    if engine == 'arcpy':
+        fcs = arcpy.ListFeatureClasses(feature_type='polygon')
+    elif engine == 'shapely':
+        fcs = vector_intersect.list_polygon_layers(input_gdb)
+
+    # remove any feature class that does not have "privateforest" in its name
+    # and skip the forest cover layer
+    return [fc for fc in fcs if "privateforest" in fc and fc != forest]
+
+
+def scratch_gdb():
+    '''File geodatabase of this process for the intermediate outputs, made if it doesn't exist.'''
+    path = os.path.join(tempfile.gettempdir(), 'forest_scratch_{}.gdb'.format(os.getpid()))
+    if not arcpy.Exists(path):
+        arcpy.CreateFileGDB_management(os.path.dirname(path), os.path.basename(path))
+    return path
+
+
+def process(fc):
+    '''Intersect one private forest parcel layer with the forest pixels, and calculate Forest_Acres.'''
+    print('\n', fc)
+
+    if engine == 'shapely':
+        # intersect and calculate the acreage in one step
+        message = "   intersecting forest pixels and private parcels, calculating area in acres"
+        with stage_timer.StageTimer(fc, 'intersect', message) as t:
+            # shared on-disk index of the forest layer, built by forest_index.py
+            index = forest_index.open_index(input_gdb, forest)
+            if tiled:
+                t.features_out, tiles = tiled_intersect.intersect_layer_tiled(
+                    input_gdb, fc, forest, fc + "_intersect", memory_budget_mb, index)
+                print("     {} tiles".format(tiles))
+            else:
+                t.features_out = len(vector_intersect.intersect_layer(input_gdb, fc, forest, fc + "_intersect", index))
+        return
 
-# remove any feature class that does not have "privateforest" in its name
-fcs = [fc for fc in fcs if "privateforest" in fc]
+    # other county jobs add layers to the same geodatabase (run_counties_parallel.py), so the
+    # intersect is written to a scratch geodatabase and copied over under the write lock
+    scratch = os.path.join(scratch_gdb(), fc + "_intersect")
 
-# iterate through the feature classes
-for fc in fcs:
-    if fc != forest:  # skip the forest cover layer
+    # intersect the private parcels with the forest pixels
+    with stage_timer.StageTimer(fc, 'intersect', "   intersecting forest pixels and private parcels") as t:
+        t.features_in = lambda: int(arcpy.GetCount_management(fc)[0])
 
-        print('\n', fc)
+        # use the county tile of the forest layer, made by tile_forest_layer.py
+        arcpy.Intersect_analysis([fc, tile_forest_layer.county_forest(fc)], scratch, "ALL")
 
-        # select the private parcels
-        print("   intersecting forest pixels and private parcels")
-        starttime = time.time()  # start the stopwatch
+        t.features_out = lambda: int(arcpy.GetCount_management(scratch)[0])
 
-        arcpy.Intersect_analysis([fc, forest], fc + "_intersect", "ALL")
+    # calculate acreage
+    # use the existing "Forest_Acres" field from the previous step
+    with stage_timer.StageTimer(fc, 'forest acres', "   calculating geometry: area in acres", t.features_out):
+        arcpy.CalculateField_management(scratch, "Forest_Acres", "!SHAPE.AREA@ACRES!", "PYTHON3")
 
-        secs = round(time.time() - starttime, 1)
-        print("     done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+    # save the intersect to the geodatabase
+    with stage_timer.StageTimer(fc, 'save', "   saving " + fc + "_intersect", t.features_out):
+        with gdb_lock.gdb_write_lock(input_gdb):
+            arcpy.CopyFeatures_management(scratch, fc + "_intersect")
+        arcpy.Delete_management(scratch)
 
 
-        # calculate acreage
-        # use the existing "Forest_Acres" field from the previous step
-        print("   calculating geometry: area in acres")
-        starttime = time.time()  # start the stopwatch
+if __name__ == '__main__':
 
-        arcpy.CalculateField_management(fc + "_intersect", "Forest_Acres", "!SHAPE.AREA@ACRES!", "PYTHON3")
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
 
-        secs = round(time.time() - starttime, 1)
-        print("     done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+    # iterate through the feature classes
+    for fc in list_jobs():
+        process(fc)
 
-t2 = time.time() # stop the total runtime timer
-secs = round(t2 - t1, 1)
-print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
@@ -29,6 +29,191 @@ lengthfield = "LEN_FT"
 area_unit = "acres"  # valid:  acres, squarefeet, squaremiles, hectares, squaremeters
 length_unit = "feet" # valid:  feet, meters, miles
 
+# Aggregate-only mode: the length/area of each pair is summed in memory while reading the intersect
+# output, and only the "_summarize" table is written (same fields as the Statistics_analysis output:
+# INPUTNAME, FREQUENCY, SUM_<field>).  The intersect runs in the in_memory workspace, and no
+# CalculateField, "_geomcalc" table or Statistics_analysis is needed.
+# persist_intersects keeps the intersect feature classes (the full Intersect output, with every
+# attribute of both inputs but no area/length field) and persist_geomcalc the "_geomcalc" detail
+# table, for checking the results.
+aggregate_only = False
+persist_intersects = False
+persist_geomcalc = False
+
+# square meters per area unit, meters per length unit.  Same values as measure.py, which this
+# script can't import (Python 2, no Shapely in ArcGIS Desktop)
+AREA_UNITS = {"acres": 4046.8564224, "squarefeet": 0.09290304, "squaremiles": 2589988.110336,
+              "hectares": 10000.0, "squaremeters": 1.0}
+LENGTH_UNITS = {"feet": 0.3048, "meters": 1.0, "miles": 1609.344}
+
+
+# Skip the Intersect for pairs of layers that can't intersect, and write their zero row directly.
+# No output feature class is created for a skipped pair.
+# Every layer's extent is compared first.  With coverage_grid > 0, each layer also gets a coarse
+# grid (coverage_grid x coverage_grid cells over the extent of all inputs) marking the cells its
+# feature extents touch, and a pair is skipped if the two layers share no cell.
+# The grid is off by default:  building it reads the geometry of every feature of every input once.
+# Turn it on (ex: coverage_grid = 64) when the input layers are scattered, so their extents overlap
+# but their features mostly don't (ex: county layers against statewide layers of small areas).
+# Note: all inputs are assumed to be in the same coordinate system.
+prune_pairs = True
+coverage_grid = 0  # cells per side, 0 = off (compare layer extents only)
+
+# Copy the input layers to the in_memory workspace before the intersects, so each layer is read
+# from its drive once:  every input_02 layer once at the start (they are read again for every
+# input_01 layer otherwise), and each input_01 layer at the start of its outer loop.
+# The geoprocessing tools can't run in background threads, so the reads are moved up front
+# instead of overlapped with the intersects (prefetch.py does that for the pyogrio scripts).
+# Note: needs the memory for all of the input_02 layers plus one input_01 layer.
+stage_inputs = False
+
+# in_memory copies of the input layers, {path: in_memory path}
+staged = {}
+
+
+def extents_overlap(a, b):
+    # True if two arcpy Extent objects overlap (or touch)
+    return not (a.XMax < b.XMin or b.XMax < a.XMin or a.YMax < b.YMin or b.YMax < a.YMin)
+
+
+def coverage_cells(path, full_extent, ncells):
+    # set of (column, row) grid cells touched by the feature extents of a layer
+    cellwidth = (full_extent.XMax - full_extent.XMin) / ncells or 1
+    cellheight = (full_extent.YMax - full_extent.YMin) / ncells or 1
+
+    def cell(x, origin, size):
+        return min(max(int((x - origin) // size), 0), ncells - 1)
+
+    cells = set()
+    with arcpy.da.SearchCursor(path, ['SHAPE@']) as searchcurs:
+        for row in searchcurs:
+            if row[0] is None:
+                continue
+            ext = row[0].extent
+            for col in range(cell(ext.XMin, full_extent.XMin, cellwidth), cell(ext.XMax, full_extent.XMin, cellwidth) + 1):
+                for rw in range(cell(ext.YMin, full_extent.YMin, cellheight), cell(ext.YMax, full_extent.YMin, cellheight) + 1):
+                    cells.add((col, rw))
+    return cells
+
+
+def plan_layers(paths):
+    # extent (and coverage grid cells) of every input layer, keyed by path
+    extents = dict((path, arcpy.Describe(path).extent) for path in paths)
+    plan = dict((path, (extents[path], None)) for path in paths)
+
+    if coverage_grid > 0 and extents:
+        full_extent = arcpy.Extent(min(e.XMin for e in extents.values()), min(e.YMin for e in extents.values()),
+                                   max(e.XMax for e in extents.values()), max(e.YMax for e in extents.values()))
+        for path in paths:
+            plan[path] = (extents[path], coverage_cells(path, full_extent, coverage_grid))
+
+    return plan
+
+
+def may_intersect(plan_a, plan_b):
+    # False only if the two layers provably don't intersect
+    if not extents_overlap(plan_a[0], plan_b[0]):
+        return False
+    if plan_a[1] is not None and plan_b[1] is not None:
+        return not plan_a[1].isdisjoint(plan_b[1])
+    return True
+
+
+def stage_layer(path, filename):
+    # copy a layer to in_memory, named like the input so the FID_ fields of the intersects keep their names
+    name = os.path.splitext(filename)[0]
+    if "in_memory\\" + name in staged.values():
+        name = name + "_01"
+    staged[path] = "in_memory\\" + name
+    arcpy.CopyFeatures_management(path, staged[path])
+
+
+def unstage_layer(path):
+    if path in staged:
+        arcpy.Delete_management(staged.pop(path))
+
+
+def source(path):
+    # the in_memory copy of a layer, if it has one
+    return staged.get(path, path)
+
+
+def summarize_aggregate(filename_01):
+    # aggregate-only mode:  intersect one input_01 layer with every input_02 layer,
+    # and write its "_summarize" table from sums kept in memory
+    path_01 = os.path.join(dirpath_01, filename_01)
+    geomdesc = arcpy.Describe(path_01).shapeType
+
+    if geomdesc == "Polyline":
+        valuefield, token, unit_size = lengthfield, 'SHAPE@LENGTH', LENGTH_UNITS[length_unit]
+    elif geomdesc == "Polygon":
+        valuefield, token, unit_size = areafield, 'SHAPE@AREA', AREA_UNITS[area_unit]
+    else:
+        return
+
+    if persist_geomcalc:
+        geomcalc = os.path.join(sumtables, filename_01 + '_geomcalc')
+        arcpy.CreateTable_management(sumtables, filename_01 + '_geomcalc')
+        arcpy.AddField_management(geomcalc, 'INPUTNAME', 'TEXT', '', '', 80)
+        arcpy.AddField_management(geomcalc, valuefield, 'DOUBLE')
+        cursor = arcpy.da.InsertCursor(geomcalc, ['INPUTNAME', valuefield])
+
+    # INPUTNAME: [FREQUENCY, SUM]
+    sums = {}
+
+    for filename_02 in filenames_02:
+        path_02 = os.path.join(dirpath_02, filename_02)
+        output_fc = filename_01 + "_" + filename_02
+        print output_fc
+
+        values = []
+
+        if prune_pairs and not may_intersect(plan[path_01], plan[path_02]):
+            print "  no overlap, skipped"
+        else:
+            if not persist_intersects:
+                output_fc = "in_memory\\" + output_fc
+
+            arcpy.Intersect_analysis(source(path_01) + ";" + source(path_02), output_fc, "ALL", "", "INPUT")
+
+            # the shape tokens are in the units of the coordinate system, convert them to the output units
+            outdesc = arcpy.Describe(output_fc)
+            if outdesc.shapeType == geomdesc:
+                mpu = outdesc.spatialReference.metersPerUnit
+                if token == 'SHAPE@AREA':
+                    factor = mpu * mpu / unit_size
+                else:
+                    factor = mpu / unit_size
+                with arcpy.da.SearchCursor(output_fc, [token]) as searchcurs:
+                    values = [row[0] * factor for row in searchcurs]
+
+            if not persist_intersects:
+                arcpy.Delete_management(output_fc)
+
+        # an empty intersect is recorded as a single zero row, as in the geomcalc table
+        if not values:
+            values = [0]
+
+        sums[filename_02] = [len(values), sum(values)]
+        if persist_geomcalc:
+            for value in values:
+                cursor.insertRow([filename_02, value])
+
+    if persist_geomcalc:
+        del cursor
+
+    # write the summarize table in one go
+    sumtable = os.path.join(sumtables, filename_01 + '_summarize')
+    arcpy.CreateTable_management(sumtables, filename_01 + '_summarize')
+    arcpy.AddField_management(sumtable, 'INPUTNAME', 'TEXT', '', '', 80)
+    arcpy.AddField_management(sumtable, 'FREQUENCY', 'LONG')
+    arcpy.AddField_management(sumtable, 'SUM_' + valuefield, 'DOUBLE')
+
+    with arcpy.da.InsertCursor(sumtable, ['INPUTNAME', 'FREQUENCY', 'SUM_' + valuefield]) as sumcursor:
+        for name in sorted(sums):
+            sumcursor.insertRow([name] + sums[name])
+
+
 # walk through input datasets and unpack the lists of filenames
 # Note: Walk() returns a Generator object. Each next() call returns a tuple of 3
 # since we're not browsing subdirectories, only one call to next() is required
@@ -41,9 +226,27 @@ dirpath_02, dirnames_02, filenames_02 = arcpy.da.Walk(input_02).next()
 
 starttime = time.time()  # start the stopwatch
 
+# planning step: extents and coverage of all input layers, read once
+if prune_pairs:
+    plan = plan_layers([os.path.join(dirpath_01, f) for f in filenames_01] +
+                       [os.path.join(dirpath_02, f) for f in filenames_02])
+
+# read every input_02 layer once
+if stage_inputs:
+    for filename_02 in filenames_02:
+        stage_layer(os.path.join(dirpath_02, filename_02), filename_02)
+
 # outer loop
 for filename_01 in filenames_01:
 
+    if stage_inputs:
+        stage_layer(os.path.join(dirpath_01, filename_01), filename_01)
+
+    if aggregate_only:
+        summarize_aggregate(filename_01)
+        unstage_layer(os.path.join(dirpath_01, filename_01))
+        continue
+
     # create the new summary table here, for storing the length or area of each intersection
     sumtablename = filename_01 + '_geomcalc'  # name of the summary table
     arcpy.CreateTable_management(sumtables, sumtablename)
@@ -70,13 +273,20 @@ for filename_01 in filenames_01:
     # inner loop
     for filename_02 in filenames_02:
         # create a string containing the full paths to the two current input features
-        inputFeatures = os.path.join(dirpath_01, filename_01) + ";" + os.path.join(dirpath_02, filename_02)
+        inputFeatures = source(os.path.join(dirpath_01, filename_01)) + ";" + source(os.path.join(dirpath_02, filename_02))
 
         # create the string for the name of the feature class storing the intersect results
         output_fc = filename_01 + "_" + filename_02
 
         print output_fc
 
+        # pairs that can't intersect get their zero row, without running Intersect
+        if prune_pairs and not may_intersect(plan[os.path.join(dirpath_01, filename_01)],
+                                             plan[os.path.join(dirpath_02, filename_02)]):
+            print "  no overlap, skipped"
+            cursor.insertRow([filename_02, 0])
+            continue
+
         # execute the Intersect geoprocessing tool
         arcpy.Intersect_analysis(inputFeatures, output_fc, "ALL", "", "INPUT")
 
@@ -142,6 +352,8 @@ for filename_01 in filenames_01:
         out_table = os.path.join(sumtables, filename_01 + '_summarize')
         arcpy.Statistics_analysis(in_table, out_table, [[areafield, "SUM"]], "INPUTNAME")
 
+    unstage_layer(os.path.join(dirpath_01, filename_01))
+
 endtime = time.time()  # stop the stopwatch
 
 # Done.  Print the elapsed seconds.
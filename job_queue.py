@@ -0,0 +1,348 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Job queue for spreading a statewide run over several machines, in place of
+run_counties_parallel.py's pool of processes on one machine.
+
+The coordinator puts the jobs of a step in a queue (a SQLite database file on a shared
+drive), and workers on any number of machines take jobs from it, run them, and write back
+the result, the printed output and the time of each job:
+
+    python job_queue.py submit forest_parcels_pipeline     (once, on the coordinator)
+    python job_queue.py work 8                             (on each machine, 8 worker processes)
+    python job_queue.py status
+    python job_queue.py record                             (on the coordinator, when the run is done)
+
+Each submit is a new run (the run id of stage_timer.py), with its own rows in the queue, so
+the same step can be submitted again on every update.  Submitting with the run id of an
+earlier run (FOREST_RUN_ID) only adds the jobs that run doesn't have.  record saves the job
+times of the last run to the job log of the coordinator, for the cost estimates of the next
+run.
+
+A job is one call of a step script's process(), with one of the names from its list_jobs()
+(a county layer, or any other name the step takes, ex: a pair of layers).  The jobs are
+taken longest first, by the cost estimate of job_scheduler.py.
+
+Leases:  a worker takes a job for lease_secs, and renews the lease from a background thread
+while the job runs.  If the worker dies (machine off, process killed, network drive lost),
+the lease runs out and the job goes to the next free worker, up to max_attempts times.  An
+error raised by the step is not retried:  the job is marked failed with its traceback.  A
+worker only writes the result of a job while it still holds the lease.
+
+Workers wait for the jobs of other workers to finish (or their leases to run out) before
+stopping, so a job of a dead worker is always picked up again.
+
+The queue needs a drive where SQLite file locking works:  a network share with working
+byte-range locks (an SMB file server), not a synced drive (Google Drive, OneDrive), which
+doesn't lock files across machines.  There is no default, set queue_path or the
+FOREST_QUEUE environment variable.  Every change is a short transaction, so workers only
+wait for each other for milliseconds.
+
+Runs without arcpy (sqlite3).  The workers need the step scripts and the same geodatabase
+path (input_gdb) on every machine.
+'''
+
+import contextlib
+import datetime
+import importlib
+import io
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+
+import stage_timer
+
+input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
+
+# queue database, on a drive where SQLite file locking works (see above), the same path on every machine
+queue_path = os.environ.get('FOREST_QUEUE')
+
+# seconds a worker holds a job without renewing the lease
+lease_secs = 300
+
+# runs of a job whose worker died before it is marked failed
+max_attempts = 3
+
+# seconds between checks for new jobs, when a worker has nothing to do
+poll_secs = 5
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    run TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    job TEXT NOT NULL,
+    cost REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    started REAL,
+    finished REAL,
+    wall_secs REAL,
+    error TEXT,
+    log TEXT,
+    UNIQUE (run, stage, job)
+)
+'''
+
+
+def connect(path=None):
+    '''Open the queue database, creating it if needed.  Transactions are started explicitly.'''
+    path = path or queue_path
+    if not path:
+        raise ValueError('no queue database:  set job_queue.queue_path or the FOREST_QUEUE environment variable')
+    conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute(SCHEMA)
+    return conn
+
+
+@contextlib.contextmanager
+def transaction(conn):
+    '''Write transaction, taking the database lock at the start so two workers can't take the same job.'''
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def job_costs(stage, jobs):
+    '''Cost estimate of each job, from job_scheduler.py (0 if it can't be estimated).'''
+    module = importlib.import_module(stage)
+    try:
+        import job_scheduler
+        return job_scheduler.job_costs(stage, jobs, module.input_gdb)[0]
+    except (ImportError, AttributeError):  # no pyogrio, or a step without input_gdb
+        return dict.fromkeys(jobs, 0)
+
+
+def submit(stage, jobs=None, path=None, retry_failed=False):
+    '''Add the jobs of a step to the queue, under the current run id.  jobs defaults to the list_jobs() of the step.
+
+    Jobs already in the queue for this run are left as they are, except failed ones with retry_failed=True.
+    Returns the number of jobs added.
+    '''
+    if jobs is None:
+        jobs = importlib.import_module(stage).list_jobs()
+    costs = job_costs(stage, jobs)
+
+    conn = connect(path)
+    with transaction(conn):
+        before = conn.total_changes
+        conn.executemany('INSERT OR IGNORE INTO jobs (run, stage, job, cost) VALUES (?, ?, ?, ?)',
+                         [(stage_timer.run_id, stage, job, costs.get(job, 0)) for job in jobs])
+        added = conn.total_changes - before
+
+        if retry_failed:
+            conn.execute("UPDATE jobs SET status = 'pending', attempts = 0, error = NULL "
+                         "WHERE run = ? AND stage = ? AND status = 'failed'", (stage_timer.run_id, stage))
+    conn.close()
+    return added
+
+
+def claim(conn, worker):
+    '''Take the next job:  the most costly pending job, or a job whose lease ran out.  Returns the row or None.'''
+    now = time.time()
+    with transaction(conn):
+        # jobs whose worker died too many times
+        conn.execute("UPDATE jobs SET status = 'failed', finished = ?, error = 'lease expired, worker lost ' || attempts || ' times' "
+                     "WHERE status = 'running' AND lease_expires < ? AND attempts >= ?", (now, now, max_attempts))
+
+        row = conn.execute("SELECT * FROM jobs WHERE status = 'pending' OR (status = 'running' AND lease_expires < ?) "
+                           "ORDER BY cost DESC, id LIMIT 1", (now,)).fetchone()
+        if row is None:
+            return None
+
+        conn.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, lease_expires = ?, started = ? "
+                     "WHERE id = ?", (worker, now + lease_secs, now, row['id']))
+    return row
+
+
+def renew(conn, job_id, worker):
+    '''Extend the lease of a running job.  Returns False if the worker no longer holds it.'''
+    with transaction(conn):
+        cursor = conn.execute("UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                              (time.time() + lease_secs, job_id, worker))
+    return cursor.rowcount == 1
+
+
+def finish(conn, job_id, worker, error, log, secs):
+    '''Save the result of a job, if the worker still holds its lease.'''
+    with transaction(conn):
+        conn.execute("UPDATE jobs SET status = ?, finished = ?, wall_secs = ?, error = ?, log = ? "
+                     "WHERE id = ? AND worker = ? AND status = 'running'",
+                     ('failed' if error else 'done', time.time(), round(secs, 3), error, log, job_id, worker))
+
+
+def active(conn):
+    '''Number of jobs pending or running.'''
+    return conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('pending', 'running')").fetchone()[0]
+
+
+def heartbeat(path, job_id, worker, stop):
+    # renew the lease until the job is done, with its own connection (connections aren't shared between threads)
+    conn = connect(path)
+    while not stop.wait(lease_secs / 3):
+        try:
+            renew(conn, job_id, worker)
+        except sqlite3.OperationalError:  # database busy or drive unavailable, try again on the next beat
+            pass
+    conn.close()
+
+
+def run_job(path, row, worker):
+    '''Run one job in this process, renewing its lease while it runs, and save the result.'''
+    stop = threading.Event()
+    beat = threading.Thread(target=heartbeat, args=(path, row['id'], worker, stop))
+    beat.daemon = True
+    beat.start()
+
+    # the stage timings of the job are logged under the run id of the queue (stage_timer.py)
+    stage_timer.run_id = row['run']
+
+    log = io.StringIO()
+    starttime = time.time()  # start the stopwatch
+    with contextlib.redirect_stdout(log):
+        try:
+            importlib.import_module(row['stage']).process(row['job'])
+            error = None
+        except Exception:
+            error = traceback.format_exc()
+    secs = time.time() - starttime
+
+    stop.set()
+    beat.join()
+
+    conn = connect(path)
+    finish(conn, row['id'], worker, error, log.getvalue(), secs)
+    conn.close()
+
+    return error, secs
+
+
+def work(path=None):
+    '''Take and run jobs until the queue has no jobs pending or running.  Returns the number of jobs run.'''
+    path = path or queue_path
+    worker = '{}:{}'.format(socket.gethostname(), os.getpid())
+    conn = connect(path)
+
+    count = 0
+    while True:
+        row = claim(conn, worker)
+        if row is None:
+            if active(conn) == 0:
+                break
+            # other workers' jobs are running, wait in case their leases run out
+            time.sleep(poll_secs)
+            continue
+
+        error, secs = run_job(path, row, worker)
+        count += 1
+        print("{}  {} {}  {}  {}".format(worker, row['stage'], row['job'], 'FAILED' if error else 'done',
+                                         datetime.timedelta(seconds=round(secs, 1))))
+        sys.stdout.flush()
+
+    conn.close()
+    return count
+
+
+def work_parallel(workers, path=None):
+    '''Run worker processes on this machine until the queue is done.'''
+    # the path is passed on, queue_path isn't set in a new process on Windows
+    processes = [multiprocessing.Process(target=work, args=(path or queue_path,)) for i in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def last_run(path=None):
+    '''Run id of the last jobs submitted, or None if the queue is empty.'''
+    conn = connect(path)
+    row = conn.execute('SELECT run FROM jobs ORDER BY id DESC LIMIT 1').fetchone()
+    conn.close()
+    return row and row['run']
+
+
+def status(run=None, path=None):
+    '''Number of jobs of each step of a run (default: the last run) by status:  {stage: {status: count}}'''
+    run = run or last_run(path)
+    conn = connect(path)
+    counts = {}
+    for stage, job_status, count in conn.execute('SELECT stage, status, COUNT(*) FROM jobs WHERE run = ? '
+                                                 'GROUP BY stage, status', (run,)):
+        counts.setdefault(stage, {})[job_status] = count
+    conn.close()
+    return counts
+
+
+def results(run=None, path=None):
+    '''Finished jobs of a run (default: the last run).
+
+    Returns a list of rows (stage, job, status, attempts, worker, wall_secs, error, log)
+    '''
+    run = run or last_run(path)
+    conn = connect(path)
+    rows = conn.execute("SELECT stage, job, status, attempts, worker, wall_secs, error, log FROM jobs "
+                        "WHERE run = ? AND status IN ('done', 'failed') ORDER BY stage, job", (run,)).fetchall()
+    conn.close()
+    return rows
+
+
+def record_results(run=None, path=None):
+    '''Save the job times of a run (default: the last run) to the job log, for the cost estimates of the
+    next run (job_scheduler.py).  Run once per run, on the coordinator, after the queue is done.
+    '''
+    import job_scheduler
+
+    run = run or last_run(path)
+    stage_timer.run_id = run  # the job times are logged under the run id of the queue
+    rows = results(run, path)
+    for row in rows:
+        job_scheduler.record_job(row['stage'], row['job'], row['wall_secs'] or 0, row['error'])
+    return len(rows)
+
+
+if __name__ == '__main__':
+
+    # python job_queue.py submit <stage> | work [<worker processes>] | status [<run>] | record [<run>]
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    run = None
+    if command == 'submit':
+        print("   run {}:  {} jobs added".format(stage_timer.run_id, submit(sys.argv[2])))
+        run = stage_timer.run_id
+
+    elif command == 'work':
+        work_parallel(int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count())
+
+    elif command in ('status', 'record'):
+        run = sys.argv[2] if len(sys.argv) > 2 else None
+
+    if command == 'record':
+        # the queue is done, save the job times for the next run's estimates
+        print("   {} job times saved to the job log".format(record_results(run)))
+
+    print("   run {}".format(run or last_run()))
+    for stage, counts in sorted(status(run).items()):
+        print("   {}:  {}".format(stage, ', '.join('{} {}'.format(n, s) for s, n in sorted(counts.items()))))
+
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
@@ -0,0 +1,113 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Orders the county jobs of a step by their estimated cost, longest first, for
+run_counties_parallel.py.
+
+With the jobs in name order, the largest county can be started last and left running
+alone at the end of the run.  Started longest first, each worker takes the next longest
+job as soon as it is free (longest processing time first scheduling), and the run takes
+about as long as the longest single job, or the total divided by the number of workers,
+whichever is more (at most 4/3 of the best possible order).
+
+Cost of a job (in seconds):
+1. the time of the same step on the same county in an earlier run (the job log, written
+   by run_counties_parallel.py as each job finishes)
+2. for a county without an earlier run, its vertex count from the geodatabase catalog
+   (gdb_catalog.py) times the seconds per vertex of the step's other counties
+3. with no earlier runs at all, the vertex count (the order is the same)
+
+print_plan() prints the estimated run time and each worker's jobs (the bins of the longest
+first assignment), before the run starts.
+'''
+
+import heapq
+import json
+import os
+
+import gdb_catalog
+import stage_timer
+
+# time of each county job of each step, one JSON record per line (the stage_timer.py format).
+# Kept apart from the stage timing log, so the job times aren't added to the step times
+job_log = os.environ.get('FOREST_JOB_LOG', 'job_timings.jsonl')
+
+
+def record_job(stage, fc, secs, error=None):
+    '''Save the time of one county job of a step to the job log.'''
+    with open(job_log, 'a') as f:
+        f.write(json.dumps({'run': stage_timer.run_id, 'county': fc, 'stage': stage,
+                            'wall_secs': round(secs, 3), 'error': error and error.splitlines()[-1]}) + '\n')
+
+
+def history(stage, log_path=None):
+    '''Time of the last run of a step on each county, from the job log:  {layer name: seconds}'''
+    log_path = log_path or job_log
+    secs = {}
+    if not os.path.exists(log_path):
+        return secs
+
+    with open(log_path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record['stage'] == stage and not record['error']:
+                secs[record['county']] = record['wall_secs']  # the log is in time order, the last run wins
+
+    return secs
+
+
+def job_costs(stage, fcs, gdb, log_path=None):
+    '''Estimated cost of each job of a step.
+
+    Returns ({layer name: cost}, True if the costs are in seconds, False if they are vertex counts)
+    '''
+    # only the layers being scheduled are described again, not every output the steps rewrote
+    catalog = gdb_catalog.refresh(gdb, set(fcs))
+    # tables have no vertices, their row count is used
+    vertices = dict((fc, (catalog[fc]['vertices'] or catalog[fc]['features']) if fc in catalog else 0) for fc in fcs)
+    known = dict((fc, secs) for fc, secs in history(stage, log_path).items() if fc in vertices)
+
+    if not known:
+        return vertices, False
+
+    # seconds per vertex of the counties with an earlier run
+    rate = sum(known.values()) / max(sum(vertices[fc] for fc in known), 1)
+    return dict((fc, known.get(fc, vertices[fc] * rate)) for fc in fcs), True
+
+
+def assign(costs, workers):
+    '''Longest first assignment of the jobs to workers, each job going to the worker that is free first.
+
+    Returns a list of (total cost, [layer names]) per worker.
+    '''
+    bins = [(0.0, i, []) for i in range(workers)]
+    for fc in sorted(costs, key=costs.get, reverse=True):
+        total, i, jobs = heapq.heappop(bins)
+        heapq.heappush(bins, (total + costs[fc], i, jobs + [fc]))
+
+    return [(total, jobs) for total, i, jobs in sorted(bins, key=lambda b: b[1])]
+
+
+def longest_first(stage, fcs, gdb, log_path=None):
+    '''Layer names in the order to start the jobs, longest first.  Returns (names, costs, in seconds)'''
+    costs, in_seconds = job_costs(stage, fcs, gdb, log_path)
+    return sorted(fcs, key=costs.get, reverse=True), costs, in_seconds
+
+
+def print_plan(costs, in_seconds, workers):
+    '''Print the estimated run time and the jobs of each worker.'''
+    bins = assign(costs, workers)
+    unit = 's' if in_seconds else ' vertices'
+    longest = max(costs.values()) if costs else 0
+
+    print("   estimated run time:  {:,.0f}{}  (longest job {:,.0f}{}, total {:,.0f}{} on {} workers)".format(
+        max(total for total, jobs in bins), unit, longest, unit, sum(costs.values()), unit, workers))
+    for i, (total, jobs) in enumerate(bins):
+        if jobs:
+            print("   worker {}:  {:,.0f}{}  {}".format(i + 1, total, unit, ', '.join(jobs)))
@@ -0,0 +1,124 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Acres and percent of every NLCD land cover class group (forest, shrub, wetland,
+developed, ...) per parcel, in one pass over each county's parcels and the land cover
+raster, instead of a workflow run per class.
+
+The other workflows overlay the parcels with one class at a time:  the forest parcel
+scripts with the forest polygon layer, and intersect_summarize.py with one Intersect per
+layer pair.  Here the parcels are rasterized onto the 30m grid of the NLCD raster once,
+and each pixel under a parcel is counted in the column of its class group
+(zonal_forest_acres.zonal_class_counts), so every class group comes out of the same pass.
+Adding a class group to CLASS_GROUPS adds two output columns, not another overlay.
+
+Output:  a table for each county parcel layer, "Parcels_<County>_landcover", one row per parcel
+  FID_Parcels_<County>  - OBJECTID of the parcel
+  Parcel_Acres          - area of the parcel, in acres
+  <Group>_Acres         - acres of the class group's pixels in the parcel
+  <Group>_pct           - <Group>_Acres / Parcel_Acres * 100
+Join it to the parcel layer on OBJECTID = FID_Parcels_<County>.
+
+The pixels are counted by pixel center, or split by fractional coverage on the parcel edges
+(fractional, as in zonal_forest_acres.py).  Pixels of classes in no group (and no data) are
+not counted, so the percents of a parcel add up to at most 100.
+
+Runs without arcpy (rasterio, pyogrio), and works with run_counties_parallel.py (stage 'landcover_summary')
+'''
+
+import datetime
+import time
+
+import pandas as pd
+import rasterio
+
+import forest_parcels_pipeline
+import measure
+import stage_timer
+import vector_intersect
+import zonal_forest_acres
+
+input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
+
+# NLCD land cover raster (all classes), on its original 30m grid
+nlcd_raster = zonal_forest_acres.nlcd_raster
+
+# output field name prefix: NLCD classes in the group
+# https://www.mrlc.gov/data/legends/national-land-cover-database-2016-nlcd2016-legend
+CLASS_GROUPS = [
+    ('Water', [11, 12]),             # open water, perennial ice/snow
+    ('Developed', [21, 22, 23, 24]), # open space, low, medium, high intensity
+    ('Barren', [31]),
+    ('Forest', [41, 42, 43]),        # deciduous, evergreen, mixed
+    ('Shrub', [51, 52]),             # dwarf scrub, shrub/scrub
+    ('Herbaceous', [71, 72, 73, 74]),
+    ('Cultivated', [81, 82]),        # pasture/hay, cultivated crops
+    ('Wetland', [90, 95]),           # woody, emergent herbaceous
+    ]
+
+# only summarize the private parcels (OWN_TYPE = private)
+private_only = True
+
+# split edge pixels between parcels by fractional coverage
+fractional = zonal_forest_acres.fractional
+supersample = zonal_forest_acres.supersample
+
+
+def list_jobs():
+    '''Names of the county parcel layers.'''
+    return forest_parcels_pipeline.list_jobs()
+
+
+def landcover_table(parcels, raster_path, groups=CLASS_GROUPS, fractional=False, supersample=5):
+    '''Acres and percent of each class group per parcel, as a DataFrame indexed by OBJECTID.'''
+    table = pd.DataFrame(index=parcels.index)
+    table['Parcel_Acres'] = measure.polygon_areas(parcels.geometry.values, 'acres')
+
+    with rasterio.open(raster_path) as src:
+        # NLCD is distributed in Albers equal area.  Put the parcels on the raster grid
+        parcels = parcels.to_crs(src.crs)
+        pixel_acres = abs(src.transform.a * src.transform.e) / measure.AREA_UNITS['acres']
+
+        counts = zonal_forest_acres.zonal_class_counts(
+            parcels, src, [classes for name, classes in groups], fractional, supersample)
+
+    for (name, classes), column in zip(groups, counts.T):
+        table[name + '_Acres'] = column * pixel_acres
+        table[name + '_pct'] = table[name + '_Acres'] / table['Parcel_Acres'] * 100
+
+    return table
+
+
+def process(fc):
+    '''Write the land cover table of one county parcel layer.'''
+    print('\n', fc)
+
+    with stage_timer.StageTimer(fc, 'landcover', "   counting land cover pixels per parcel") as t:
+        # only the geometry is needed, but the where clause only works on fields that are read
+        where = "OWN_TYPE ILIKE 'private'" if private_only else None
+        parcels = vector_intersect.read_layer(input_gdb, fc, columns=['OWN_TYPE'], where=where)
+        table = landcover_table(parcels, nlcd_raster, CLASS_GROUPS, fractional, supersample)
+        t.features_in = len(parcels)
+
+    with stage_timer.StageTimer(fc, 'save', "   saving " + fc + "_landcover", len(table)):
+        table = table.rename_axis('FID_' + fc).reset_index()
+        table['FID_' + fc] = table['FID_' + fc].astype('int32')  # the geodatabase has no 64 bit integers
+        vector_intersect.write_layer(table, input_gdb, fc + '_landcover')
+
+
+if __name__ == '__main__':
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    # iterate through the county parcel layers
+    for fc in list_jobs():
+        process(fc)
+
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
@@ -0,0 +1,167 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Planar area and length of whole arrays of geometries at once, in the same units as
+the !SHAPE.AREA@ACRES! / !shape.length@feet! expressions of the arcpy scripts.
+
+The measurements are computed on flat NumPy arrays, without a loop over features:
+one array of all the coordinates, plus offset arrays marking where each ring, part and
+feature starts (the layout of shapely.to_ragged_array and of GeoArrow / Arrow list columns)
+  area    shoelace formula per ring, outer rings added, holes subtracted
+  length  sum of the segment lengths per part
+The coordinates are moved to the first vertex before the shoelace sum, so the large UTM
+coordinates don't cost precision.
+
+polygon_areas() and line_lengths() take arrays of Shapely geometries, unpack the polygons
+(or lines) into flat arrays with shapely.to_ragged_array and measure them with
+ragged_areas() / ragged_lengths().  The unpacking costs more than the measurement itself,
+about 0.4 s for 245,000 intersected forest fragments (3.8 million vertices).  Other
+geometry types (collections, the lines and points left by touching polygons) are measured
+by GEOS.  ragged_areas() and ragged_lengths() can also be used directly on coordinates that
+are already in flat arrays.
+
+Units (units.py):
+  area    acres, hectares, squarefeet, squaremiles, squaremeters
+  length  feet, meters, miles
+Coordinates are assumed to be in meters (NAD83 UTM zone 12N), otherwise pass the
+meters_per_unit of the coordinate system.
+
+https://en.wikipedia.org/wiki/Shoelace_formula
+'''
+
+import numpy as np
+import shapely
+
+import units
+
+# square meters per area unit, meters per length unit (units.py)
+AREA_UNITS = units.AREA_UNITS
+LENGTH_UNITS = units.LENGTH_UNITS
+
+
+def segment_sums(values, offsets):
+    '''Sum of values[offsets[i]:offsets[i + 1]] for each i (empty segments sum to 0).'''
+    totals = np.concatenate([[0.0], np.cumsum(values)])
+    return totals[offsets[1:]] - totals[offsets[:-1]]
+
+
+def ring_areas(coords, ring_offsets):
+    '''Signed area of each closed ring (counterclockwise positive), by the shoelace formula.
+
+    coords is an (n, 2) array of the vertices of all rings, ring i is
+    coords[ring_offsets[i]:ring_offsets[i + 1]]
+    '''
+    ring_offsets = np.asarray(ring_offsets)
+
+    # coordinates relative to the first vertex
+    x = coords[:, 0] - coords[0, 0]
+    y = coords[:, 1] - coords[0, 1]
+
+    terms = np.zeros(len(coords))
+    terms[:-1] = x[:-1] * y[1:] - x[1:] * y[:-1]
+
+    # the last vertex of a ring is not joined to the first vertex of the next one
+    ends = ring_offsets[1:][np.diff(ring_offsets) > 0] - 1
+    terms[ends] = 0
+
+    return segment_sums(terms, ring_offsets) / 2
+
+
+def part_lengths(coords, part_offsets):
+    '''Length of each part (line or ring), part i is coords[part_offsets[i]:part_offsets[i + 1]]'''
+    part_offsets = np.asarray(part_offsets)
+
+    segments = np.zeros(len(coords))
+    segments[:-1] = np.hypot(np.diff(coords[:, 0]), np.diff(coords[:, 1]))
+
+    # no segment between the last vertex of a part and the first vertex of the next one
+    ends = part_offsets[1:][np.diff(part_offsets) > 0] - 1
+    segments[ends] = 0
+
+    return segment_sums(segments, part_offsets)
+
+
+def ragged_areas(coords, ring_offsets, polygon_offsets, feature_offsets=None):
+    '''Area of each feature from flat arrays (shapely.to_ragged_array layout), holes subtracted.
+
+    ring i is coords[ring_offsets[i]:ring_offsets[i + 1]], polygon j is rings
+    polygon_offsets[j]:polygon_offsets[j + 1] (the first one is the outer ring), and feature k is
+    polygons feature_offsets[k]:feature_offsets[k + 1] (None for single polygons)
+    '''
+    coords = np.asarray(coords, dtype='float64')
+    polygon_offsets = np.asarray(polygon_offsets)
+    if len(coords) == 0:
+        return np.zeros(len(polygon_offsets) - 1 if feature_offsets is None else len(feature_offsets) - 1)
+
+    # outer rings are added and holes subtracted, whatever way they are drawn
+    rings = np.abs(ring_areas(coords, ring_offsets))
+    sign = np.full(len(rings), -1.0)
+    sign[polygon_offsets[:-1][np.diff(polygon_offsets) > 0]] = 1.0
+
+    areas = segment_sums(rings * sign, polygon_offsets)
+    if feature_offsets is not None:
+        areas = segment_sums(areas, np.asarray(feature_offsets))
+    return areas
+
+
+def ragged_lengths(coords, part_offsets, feature_offsets=None):
+    '''Length of each feature from flat arrays (shapely.to_ragged_array layout).
+
+    part i is coords[part_offsets[i]:part_offsets[i + 1]], and feature k is parts
+    feature_offsets[k]:feature_offsets[k + 1] (None for single lines)
+    '''
+    coords = np.asarray(coords, dtype='float64')
+    if len(coords) == 0:
+        return np.zeros(len(part_offsets) - 1 if feature_offsets is None else len(feature_offsets) - 1)
+
+    lengths = part_lengths(coords, part_offsets)
+    if feature_offsets is not None:
+        lengths = segment_sums(lengths, np.asarray(feature_offsets))
+    return lengths
+
+
+def _measure(geoms, kinds, ragged, geos):
+    # flat array kernel for the geometries of the given type ids, GEOS for the rest
+    geoms = np.asarray(geoms, dtype=object)
+    values = np.zeros(len(geoms))
+
+    flat = np.isin(shapely.get_type_id(geoms), kinds)
+    if flat.any():
+        geom_type, coords, offsets = shapely.to_ragged_array(geoms[flat])
+        if geom_type in (shapely.GeometryType.POLYGON, shapely.GeometryType.LINESTRING):
+            offsets = offsets + (None,)  # one part per feature
+        values[flat] = ragged(coords, *offsets)
+
+    other = ~flat
+    if other.any():
+        values[other] = np.nan_to_num(geos(geoms[other]))
+    return values
+
+
+def polygon_areas(geoms, unit='squaremeters', meters_per_unit=1.0):
+    '''Area of each polygon in an array of Shapely geometries, in the given units.
+
+    Polygons and multipolygons are measured with ragged_areas().  Missing geometries have an area of 0.
+    '''
+    areas = _measure(geoms, [3, 6], ragged_areas, shapely.area)  # Polygon, MultiPolygon
+    return to_units(areas, unit, meters_per_unit)
+
+
+def line_lengths(geoms, unit='meters', meters_per_unit=1.0):
+    '''Length of each line in an array of Shapely geometries, in the given units.
+
+    Lines and multilines are measured with ragged_lengths().  Missing geometries have a length of 0.
+    '''
+    lengths = _measure(geoms, [1, 5], ragged_lengths, shapely.length)  # LineString, MultiLineString
+    return to_units(lengths, unit, meters_per_unit)
+
+
+def to_units(values, unit, meters_per_unit=1.0):
+    '''Convert areas or lengths in the units of the coordinate system (ex: from ragged_areas).'''
+    if unit in AREA_UNITS:
+        return values * meters_per_unit * meters_per_unit / AREA_UNITS[unit]
+    return values * meters_per_unit / LENGTH_UNITS[unit]
@@ -0,0 +1,270 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Merges the county output layers into statewide layers for publishing, the "next" step
+listed in forestpct_join_copy_calculate.py:
+  Parcels_<County>_privateforest        -> Parcels_Statewide_privateforest
+  Parcels_<County>_privateforest_10pct  -> Parcels_Statewide_privateforest_10pct
+  (and the layers of the other cutoffs in forest_thresholds.py)
+
+The statewide layers are saved to their own geodatabase (Parcels_Utah_2020_statewide.gdb),
+so the merge never writes to the geodatabase the county jobs are writing to.
+
+The county layers are streamed into each statewide layer in batches of rows (GDAL Arrow
+stream, pyogrio.write_arrow), so only one batch is in memory at a time, whatever the size
+of the state.  Each statewide layer is written in one pass, and its spatial index is built
+once, when the layer is closed at the end, not updated for every insert.
+
+Schema:  the county parcel layers don't all have the same fields.  The statewide layer
+has every field of any county (from the county parcel layers, plus the acreage fields),
+and a COUNTY field with the county name.  A county without a field gets nulls.  When the
+type of a field differs between counties, integers are widened to 64 bit, integers and
+decimals become decimals, and anything else becomes text.
+
+Run after the county steps:  python merge_statewide.py
+or with merge_as_completed(stage), which runs a step on all counties with
+run_counties_parallel.py and merges each county into the first statewide layer as soon as
+its job finishes, so the merge overlaps the county jobs instead of adding a step at the
+end.  The statewide layers are written one after the other, never two at the same time.
+
+Runs without arcpy (pyogrio, pyarrow)
+'''
+
+import contextlib
+import datetime
+import os
+import queue
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyogrio
+
+import forest_thresholds
+import stage_timer
+import vector_intersect
+
+input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
+
+# geodatabase for the statewide layers
+output_gdb = os.path.splitext(input_gdb)[0] + '_statewide.gdb'
+
+# feature layer containing forest cover layer
+forest = r'NLCD_2016_UT_Forest_polygon_NAD83utm12'
+
+# suffix of the county layers: name of the statewide layer.  Not "Parcels_Utah_...", which
+# are the output layers of Utah County.  One threshold layer per cutoff (forest_thresholds.py)
+OUTPUTS = {'_privateforest': 'Parcels_Statewide_privateforest'}
+OUTPUTS.update((suffix, 'Parcels_Statewide' + suffix)
+               for suffix in map(forest_thresholds.threshold_suffix, forest_thresholds.thresholds))
+
+# fields added by the county steps, on top of the county parcel fields
+OUTPUT_FIELDS = [('Parcel_OID', pa.int32()), ('Parcel_Acres', pa.float64()), ('Forest_Acres', pa.float64()),
+                 ('Forest_pct', pa.float64())]
+
+# rows per batch
+batch_size = 20000
+
+
+def county_layers(gdb):
+    '''Names of the county parcel layers.'''
+    fcs = vector_intersect.list_polygon_layers(gdb)
+
+    # skip the forest cover layer and its tiles, and the outputs of the steps
+    return [fc for fc in fcs if fc.startswith('Parcels_') and 'privateforest' not in fc]
+
+
+def county_layer(fc):
+    '''County parcel layer of any step's layer name, ex: "Parcels_Grand_privateforest" -> "Parcels_Grand"'''
+    return '_'.join(fc.split('_')[:2])
+
+
+def merge_type(a, b):
+    '''Type of a field that is a in one county and b in another.'''
+    if a == b or pa.types.is_null(b):
+        return a
+    if pa.types.is_null(a):
+        return b
+    if pa.types.is_integer(a) and pa.types.is_integer(b):
+        return pa.int64()
+    if (pa.types.is_integer(a) or pa.types.is_floating(a)) and (pa.types.is_integer(b) or pa.types.is_floating(b)):
+        return pa.float64()
+    return pa.string()
+
+
+def unified_schema(gdb, layers):
+    '''Arrow schema of the statewide layer:  every field of the layers, the output fields, and COUNTY.
+
+    Returns (schema without the geometry, meta of the first layer)
+    '''
+    types = {}
+    order = []
+    meta = None
+    for fc in layers:
+        # no rows are read, only the schema
+        layer_meta, table = pyogrio.read_arrow(gdb, layer=fc, max_features=0)
+        meta = meta or layer_meta
+        geometry_name = layer_meta['geometry_name'] or 'wkb_geometry'
+        for field in table.schema:
+            if field.name == geometry_name:
+                continue
+            if field.name not in types:
+                order.append(field.name)
+                types[field.name] = field.type
+            else:
+                types[field.name] = merge_type(types[field.name], field.type)
+
+    for name, type in OUTPUT_FIELDS:
+        if name not in types:
+            order.append(name)
+        types[name] = type
+
+    fields = [pa.field(name, types[name]) for name in order if name != 'COUNTY']
+    return pa.schema(fields + [pa.field('COUNTY', pa.string())]), meta
+
+
+def conform(batch, schema, county, geometry_name):
+    '''Cast a batch of a county layer to the statewide schema, with the geometry as the last column.'''
+    columns = []
+    for field in schema:
+        if field.name == 'COUNTY':
+            columns.append(pa.array([county] * batch.num_rows, pa.string()))
+        elif field.name in batch.schema.names:
+            columns.append(pc.cast(batch.column(field.name), field.type))
+        else:
+            columns.append(pa.nulls(batch.num_rows, field.type))
+    columns.append(batch.column(geometry_name))
+
+    return pa.RecordBatch.from_arrays(columns, schema=schema.append(pa.field('SHAPE', pa.binary())))
+
+
+def county_batches(gdb, layers, suffix, schema, counts):
+    '''Stream the batches of each county's output layer, cast to the statewide schema.
+
+    layers can be any iterable of layer names, including one that waits for running jobs.
+    counts is filled in with the number of features of each county.
+    '''
+    for fc in layers:
+        fc = county_layer(fc)
+        layer = fc + suffix
+        county = fc.split('_')[1]
+
+        with contextlib.ExitStack() as stack:
+            # county jobs can be adding layers to the geodatabase, don't open its list of
+            # tables while one is being written (only the open, not the whole read)
+            with vector_intersect.gdb_read_lock(gdb):
+                if layer not in pyogrio.list_layers(gdb)[:, 0]:
+                    print("   {}:  no {} layer, skipped".format(county, suffix))
+                    continue
+                meta, reader = stack.enter_context(
+                    pyogrio.raw.open_arrow(gdb, layer=layer, batch_size=batch_size, use_pyarrow=True))
+
+            counts[county] = 0
+            geometry_name = meta['geometry_name'] or 'wkb_geometry'
+            for batch in reader:
+                counts[county] += batch.num_rows
+                yield conform(batch, schema, county, geometry_name)
+
+        print("   {}:  {:,} features".format(county, counts[county]))
+
+
+def merge(gdb, layers, suffix, out_gdb, out_layer, schema, meta):
+    '''Stream the county layers into one statewide layer.  Returns {county: feature count}'''
+    counts = {}
+    batches = county_batches(gdb, layers, suffix, schema, counts)
+    stream = pa.RecordBatchReader.from_batches(schema.append(pa.field('SHAPE', pa.binary())), batches)
+
+    # the whole layer is one write, the spatial index is built when it is closed
+    pyogrio.write_arrow(stream, out_gdb, layer=out_layer, driver='OpenFileGDB', geometry_name='SHAPE',
+                        geometry_type='MultiPolygon', crs=meta['crs'])
+
+    return counts
+
+
+def completed(jobs):
+    '''Layer names from a queue, as jobs finish, until None.'''
+    while True:
+        fc = jobs.get()
+        if fc is None:
+            return
+        yield fc
+
+
+def merge_as_completed(stage, workers=None):
+    '''Run a step on all counties in parallel, and merge each county as its job finishes.
+
+    The step must write the county output layers (ex: 'forest_parcels_pipeline', or
+    'export_forest_parcels_10pct' as the last of the step-by-step scripts).
+    Returns the errors of the county jobs, as run_counties_parallel.run_parallel()
+    '''
+    import run_counties_parallel
+
+    # the schema comes from the county parcel layers, which are there before the jobs start
+    schema, meta = unified_schema(input_gdb, county_layers(input_gdb))
+
+    jobs = queue.Queue()
+    finished = []  # counties whose jobs finished, in order
+    all_finished = threading.Event()
+    failed = {}
+
+    def finished_jobs():
+        for fc in completed(jobs):
+            finished.append(fc)
+            yield fc
+        all_finished.set()
+
+    def merge_thread():
+        # one statewide layer at a time:  two layers written to one geodatabase at the same time
+        # can lose one of them (see vector_intersect.gdb_write_lock).  The first layer is merged
+        # as the jobs finish, the others from the same counties once the jobs are all done
+        for i, suffix in enumerate(OUTPUTS):
+            layers = finished_jobs() if i == 0 else list(finished)
+            try:
+                merge(input_gdb, layers, suffix, output_gdb, OUTPUTS[suffix], schema, meta)
+            except Exception as e:
+                failed[OUTPUTS[suffix]] = e
+            if not all_finished.is_set():
+                for fc in finished_jobs():  # keep emptying the queue until the jobs are done
+                    pass
+
+    thread = threading.Thread(target=merge_thread)
+    thread.start()
+
+    def on_complete(fc, error):
+        if not error:
+            jobs.put(fc)
+
+    try:
+        errors = run_counties_parallel.run_parallel(stage, workers, on_complete=on_complete)
+    finally:
+        jobs.put(None)
+        thread.join()
+
+    if failed:
+        raise RuntimeError('merge failed:  {}'.format(failed))
+
+    return errors
+
+
+if __name__ == '__main__':
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    layers = county_layers(input_gdb)
+    schema, meta = unified_schema(input_gdb, layers)
+
+    for suffix, out_layer in OUTPUTS.items():
+        print('\n', out_layer)
+        with stage_timer.StageTimer(out_layer, 'merge', "   merging county layers") as t:
+            counts = merge(input_gdb, layers, suffix, output_gdb, out_layer, schema, meta)
+            t.features_out = sum(counts.values())
+
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
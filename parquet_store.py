@@ -0,0 +1,114 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Partitioned GeoParquet storage for the county parcel layers and results, used by
+forest_parcels_pipeline.py in place of the file geodatabase on the shared drive.
+
+Every stage otherwise reads the whole feature class back from the geodatabase, including
+the geometry, even when it only needs one or two fields.  Parquet files are stored by
+column, so a stage reads only the columns it asks for, and the Forest_pct >= 10 filter
+never reads any geometry bytes.
+
+Layout (one partition per county, hive style, so the county is also a column of the dataset):
+  Parcels_Utah_2020_parquet/
+    parcels/county=Grand/part.parquet               (imported county parcel layer)
+    privateforest/county=Grand/part.parquet
+    privateforest_10pct/county=Grand/part.parquet
+
+Each file is GeoParquet:  the geometry is stored as WKB, with the CRS in the file
+metadata, and the attributes keep their types (OBJECTID int64, OWN_TYPE string,
+Parcel_Acres / Forest_Acres / Forest_pct float64).  OBJECTID is a column in the file, and
+the index of the GeoDataFrames read back.
+
+Attribute-only reads return an Arrow table.  Numeric columns without nulls can be viewed
+as NumPy arrays without a copy:  table.column('Forest_pct').to_numpy()
+
+https://geoparquet.org/
+https://arrow.apache.org/docs/python/dataset.html
+'''
+
+import os
+
+import geopandas as gpd
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import vector_intersect
+
+
+def default_store(gdb):
+    '''Parquet folder next to the geodatabase, ex: Parcels_Utah_2020_parquet'''
+    return os.path.splitext(gdb)[0] + '_parquet'
+
+
+def county_name(fc):
+    '''County of a layer name, ex: "Parcels_Grand_privateforest" -> "Grand"'''
+    return fc.split('_')[1]
+
+
+def partition_path(store, dataset, county):
+    return os.path.join(store, dataset, 'county=' + county, 'part.parquet')
+
+
+def has_partition(store, dataset, county):
+    return os.path.exists(partition_path(store, dataset, county))
+
+
+def write_partition(df, store, dataset, county):
+    '''Write a GeoDataFrame (indexed by OBJECTID) to the partition of one county, replacing it.'''
+    path = partition_path(store, dataset, county)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    df = df.rename_axis('OBJECTID').reset_index()
+    df['OBJECTID'] = df['OBJECTID'].astype('int64')
+
+    # write a new file, then swap it in, so a reader never sees a half-written partition
+    df.to_parquet(path + '.tmp', index=False, compression='zstd')
+    os.replace(path + '.tmp', path)
+
+
+def read_partition(store, dataset, county, columns=None, filters=None):
+    '''Read the partition of one county into a GeoDataFrame, indexed by OBJECTID.
+
+    columns are the attribute columns to read (the geometry is always read).
+    filters are pyarrow filters, ex: [('OWN_TYPE', '=', 'Private')]
+    '''
+    if columns is not None:
+        columns = ['OBJECTID'] + [c for c in columns if c != 'OBJECTID'] + ['geometry']
+    df = gpd.read_parquet(partition_path(store, dataset, county), columns=columns, filters=filters)
+    return df.set_index('OBJECTID')
+
+
+def read_columns(store, dataset, county, columns, filters=None):
+    '''Read attribute columns of one county as an Arrow table, without the geometry.'''
+    return pq.read_table(partition_path(store, dataset, county), columns=columns, filters=filters)
+
+
+def read_dataset(store, dataset, columns, filter=None):
+    '''Read attribute columns of every county as one Arrow table, with a "county" column.
+
+    filter is a pyarrow expression, ex: pc.field('Forest_pct') >= 10.0
+    '''
+    data = ds.dataset(os.path.join(store, dataset), format='parquet', partitioning='hive')
+    return data.to_table(columns=columns, filter=filter)
+
+
+def above_threshold(store, threshold, columns=('OBJECTID', 'Forest_pct')):
+    '''Private forest parcels of every county with at least threshold percent forest.
+
+    Only the OBJECTID and Forest_pct columns are read, never the geometry.
+    '''
+    return read_dataset(store, 'privateforest', list(columns) + ['county'],
+                        pc.field('Forest_pct') >= threshold)
+
+
+def import_layer(gdb, fc, store, dataset='parcels'):
+    '''Copy a county feature class from the geodatabase to its partition.  Returns the feature count.'''
+    df = vector_intersect.read_layer(gdb, fc)
+    write_partition(df, store, dataset, county_name(fc))
+    return len(df)
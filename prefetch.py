@@ -0,0 +1,139 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Runs a loop over counties (or layers) as three overlapped stages, instead of read,
+process and write one after the other:
+  read     in a background thread, reads the next jobs ahead of time
+  compute  in the calling thread
+  write    in a background thread, saves the results of the previous jobs
+
+While county N is in the overlay, county N+1 is being read from the shared drive and
+county N-1 is being written back, so the CPU isn't idle during reads and the drive isn't
+idle during the overlay.  The queues between the stages hold at most depth jobs, so no
+more than depth counties are read ahead or waiting to be written (memory stays bounded).
+
+    run_pipelined(list_jobs(), read_county, overlay, save_county)
+
+read(job) -> data,  compute(job, data) -> result,  write(job, result)
+
+Jobs go through each stage in order.  An error in any stage stops the loop, and is
+raised in the calling thread once the other threads have stopped.  The work finished
+before the error is kept:  after a read error, the jobs already read are computed and
+written, and after a compute error, the results already computed are written.  After a
+write error nothing more is written.
+
+The reading and writing must be thread safe:  pyogrio / GDAL, NumPy and Shapely release
+the GIL while they work.  arcpy geoprocessing tools are not thread safe and should not be
+used in read or write.  When read and write use the same geodatabase, read has to take
+vector_intersect.gdb_read_lock (write_layer takes gdb_write_lock):  a layer written to a file
+geodatabase is added to its list of tables, and a read opening the geodatabase at the same
+time can see that list half written.  Take it for each layer read, not the whole read, so
+the writes of other jobs can go in between.
+
+Works in Python 2 (ArcGIS Desktop) and Python 3.
+'''
+
+import sys
+import threading
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
+# marks the end of a queue
+_DONE = object()
+
+
+def _put(q, item, stop):
+    # put an item on a full queue, unless the loop is stopping
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(q, stop):
+    # get the next item, or _DONE if the loop is stopping
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return _DONE
+
+
+def run_pipelined(jobs, read, compute, write, depth=2):
+    '''Run read, compute and write on every job, with the read and write of other jobs in background threads.
+
+    Returns the number of jobs computed.
+    '''
+    read_q = queue.Queue(depth)
+    write_q = queue.Queue(depth)
+    stop = threading.Event()  # stops the reader and the compute loop
+    write_failed = threading.Event()  # the writer stopped on an error
+    errors = []
+
+    def reader():
+        try:
+            for job in jobs:
+                if not _put(read_q, (job, read(job)), stop):
+                    return
+        except Exception:
+            # the jobs already read are still computed, the end is marked after them
+            errors.append(sys.exc_info())
+        _put(read_q, _DONE, stop)
+
+    def writer():
+        # writes every result it is given until the end mark, which is always sent unless it failed
+        while True:
+            item = _get(write_q, write_failed)
+            if item is _DONE:
+                return
+            try:
+                write(*item)
+            except Exception:
+                errors.append(sys.exc_info())
+                write_failed.set()
+                stop.set()
+                return
+
+    threads = [threading.Thread(target=reader), threading.Thread(target=writer)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    count = 0
+    try:
+        while True:
+            item = _get(read_q, stop)
+            if item is _DONE:
+                break
+            job, data = item
+            result = compute(job, data)
+            del data  # the input can be freed while the result waits to be written
+            if not _put(write_q, (job, result), write_failed):
+                break
+            count += 1
+    except Exception:
+        errors.append(sys.exc_info())
+        stop.set()
+    finally:
+        # let the writer finish the results already computed
+        _put(write_q, _DONE, write_failed)
+        threads[1].join()
+        stop.set()
+        threads[0].join()
+
+    if errors:
+        error = errors[0][1]
+        raise error
+
+    return count
@@ -0,0 +1,105 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Selection engine for export_forest_parcels.py (engine = 'pushdown'), in place of
+SelectLayerByAttribute -> SelectLayerByLocation -> CopyFeatures, which makes three
+passes over the county layer.
+
+The filters are applied cheapest first, and each one only sees the parcels that passed
+the one before it:
+1. attribute:  the OWN_TYPE column is scanned on its own (the geometry is not read), and
+   only the OBJECTIDs of the private parcels are kept
+2. bounding box:  the private parcels are read in chunks, and their bounding boxes are
+   tested against the bounding boxes of the forest polygons from the forest index
+   (forest_index.py).  No forest polygon is read in this step
+3. exact:  the parcels left are tested against the forest polygons whose boxes they touch,
+   and only those forest polygons are read (Shapely intersects, as the INTERSECT
+   relationship of SelectLayerByLocation:  parcels touching a forest pixel are selected)
+
+The matches of each chunk are written to the output layer as soon as the chunk is done, so
+only one chunk of parcels is in memory at a time.  The geometries of the parcels that aren't
+private are never read.
+
+Runs without arcpy (pyogrio, Shapely 2)
+'''
+
+import numpy as np
+import pyarrow.compute as pc
+import pyogrio
+import shapely
+
+import vector_intersect
+
+# parcels read and tested at a time
+chunk_size = 50000
+
+
+def private_fids(gdb, fc):
+    '''OBJECTIDs of the private parcels (OWN_TYPE = private, any case), from the OWN_TYPE column only.
+
+    Returns (OBJECTIDs, number of features in the layer)
+    '''
+    meta, table = pyogrio.read_arrow(gdb, layer=fc, columns=['OWN_TYPE'], read_geometry=False, return_fids=True)
+    private = pc.fill_null(pc.equal(pc.utf8_lower(table.column('OWN_TYPE')), 'private'), False)
+    fids = table.column(meta['fid_column'] or 'OBJECTID').filter(private).to_numpy()
+    return fids, table.num_rows
+
+
+def forest_matches(parcels, gdb, forest_layer, index):
+    '''Positions of the parcels (GeoDataFrame) that intersect a forest polygon.
+
+    Returns (positions of the parcels passing the bounding box test, positions of the matches)
+    '''
+    geoms = parcels.geometry.values
+    forest_fids, forest_bounds = index.query_boxes_bounds(parcels.bounds.values)
+    if len(forest_fids) == 0:
+        return np.empty(0, dtype='int64'), np.empty(0, dtype='int64')
+
+    # bounding box pairs, from the boxes alone
+    boxes = shapely.STRtree(shapely.box(*forest_bounds.T))
+    parcel_idx, box_idx = boxes.query(shapely.box(*parcels.bounds.values.T), predicate='intersects')
+    if len(parcel_idx) == 0:
+        return np.empty(0, dtype='int64'), np.empty(0, dtype='int64')
+
+    # only the forest polygons of the pairs are read
+    forest = vector_intersect.read_layer(gdb, forest_layer, columns=[], fids=forest_fids[np.unique(box_idx)])
+    forest_geoms = forest.geometry.loc[forest_fids[box_idx]].values
+
+    hit = shapely.intersects(geoms[parcel_idx], forest_geoms)
+    return np.unique(parcel_idx), np.unique(parcel_idx[hit])
+
+
+def select_forest_parcels(gdb, fc, forest_layer, out_layer, index):
+    '''Write the private parcels that intersect the forest to out_layer, chunk by chunk.
+
+    index is a forest_index.ForestIndex of the forest layer.
+    Returns the number of parcels after each filter:  {'features', 'private', 'bbox', 'forest'}
+    '''
+    fids, features = private_fids(gdb, fc)
+    counts = {'features': features, 'private': len(fids), 'bbox': 0, 'forest': 0}
+
+    empty = None
+    for start in range(0, len(fids), chunk_size):
+        parcels = vector_intersect.read_layer(gdb, fc, fids=fids[start:start + chunk_size])
+        candidates, matches = forest_matches(parcels, gdb, forest_layer, index)
+        counts['bbox'] += len(candidates)
+        if len(matches) == 0:
+            empty = parcels.iloc[:0]
+            continue
+
+        # the first chunk with matches replaces the layer, the others are added to it
+        vector_intersect.write_layer(parcels.iloc[matches], gdb, out_layer, append=counts['forest'] > 0)
+        counts['forest'] += len(matches)
+
+    if counts['forest'] == 0:
+        # an empty layer with the fields of the county layer, as CopyFeatures of an empty selection
+        # (max_features=0 is no limit in pyogrio, an empty list of OBJECTIDs reads no rows)
+        if empty is None:
+            empty = vector_intersect.read_layer(gdb, fc, fids=[])
+        vector_intersect.write_layer(empty, gdb, out_layer)
+
+    return counts
@@ -0,0 +1,172 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Runs one step of the forest parcel workflow on all of the county layers at once,
+using a pool of worker processes instead of one county at a time.
+
+The county jobs of each step are independent, so each county layer is sent to a
+worker process.  Every step script has the same two functions for this:
+  list_jobs()  - names of the layers the script would loop over
+  process(fc)  - the work done for one layer inside that loop
+
+Steps, in order:
+  export_forest_parcels.py
+  add_acreages.py
+  intersect_forest_parcels.py  (or zonal_forest_acres.py for the raster mode)
+  calculate_summary_stats.py
+  forestpct_join_copy_calculate.py
+  export_forest_parcels_10pct.py
+
+The longest jobs are started first, so the longest county isn't left running alone at
+the end.  The cost of each job is estimated by job_scheduler.py, from the time of the same
+job in earlier runs and the vertex counts of the geodatabase catalog (gdb_catalog.py), or
+by feature count where pyogrio isn't installed.  An error in one county is printed with its
+traceback and the other counties keep going.  The time of each job is saved to the job
+log (job_scheduler.py) for the estimates of the next run.
+
+The county jobs all write to the same geodatabase.  The steps take the write lock of
+gdb_lock.py around each tool that adds, deletes or changes a layer, since two processes
+doing that at the same time can lose one of the layers.  The long intersect is written to
+a scratch geodatabase of the worker (intersect_forest_parcels.scratch_gdb) and copied over
+under the lock.
+
+To spread the jobs over several machines, use job_queue.py.
+
+The printed timing output of each county is collected in its worker, and written out
+in one block per county when it finishes.  The merged log is also saved to a text file,
+in the same format as intersect_forest_parcels_output.txt.
+'''
+
+import contextlib
+import datetime
+import importlib
+import io
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def job_size(module, fc):
+    '''Number of features in a layer, used to start the largest counties first.'''
+    if hasattr(module, 'arcpy'):
+        return int(module.arcpy.GetCount_management(fc)[0])
+
+    import pyogrio
+    return pyogrio.read_info(module.input_gdb, layer=fc)['features']
+
+
+def run_job(stage, fc):
+    '''Run one county layer through a step, in a worker process.
+
+    Returns (layer name, error traceback or None, printed output, elapsed seconds)
+    '''
+    module = importlib.import_module(stage)
+
+    log = io.StringIO()
+    starttime = time.time()  # start the stopwatch
+
+    with contextlib.redirect_stdout(log):
+        try:
+            module.process(fc)
+            error = None
+        except Exception:
+            error = traceback.format_exc()
+
+    return fc, error, log.getvalue(), time.time() - starttime
+
+
+def largest_first(stage, fcs):
+    '''Sort layer names by feature count, largest first.'''
+    module = importlib.import_module(stage)
+    return sorted(fcs, key=lambda fc: job_size(module, fc), reverse=True)
+
+
+def run_parallel(stage, workers=None, fcs=None, on_complete=None):
+    '''Run a step on every county layer with a pool of worker processes.
+
+    stage is the name of the step script, without ".py"
+    workers defaults to the number of cores
+    fcs defaults to the list_jobs() of the step
+    on_complete(fc, error) is called in this process as each county finishes
+
+    Returns a dict of {layer name: error traceback or None}
+    '''
+    # worker processes log their stage timings under the same run id (stage_timer.py)
+    os.environ.setdefault('FOREST_RUN_ID', datetime.datetime.now().strftime('%Y%m%d_%H%M%S'))
+
+    module = importlib.import_module(stage)
+    if fcs is None:
+        fcs = module.list_jobs()
+    workers = workers or os.cpu_count()
+
+    try:
+        import job_scheduler
+    except ImportError:  # no pyogrio (arcpy only environment)
+        job_scheduler = None
+        fcs = largest_first(stage, fcs)
+    else:
+        fcs, costs, in_seconds = job_scheduler.longest_first(stage, fcs, module.input_gdb)
+        job_scheduler.print_plan(costs, in_seconds, workers)
+
+    logs = {}
+    errors = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # jobs are started in the order they are submitted
+        futures = {pool.submit(run_job, stage, fc): fc for fc in fcs}
+
+        for future in as_completed(futures):
+            fc = futures[future]
+            try:
+                fc, error, log, secs = future.result()
+            except Exception:
+                # the worker process itself died (not an error raised by the step)
+                error, log, secs = traceback.format_exc(), '', 0
+
+            if error:
+                log += "   FAILED\n" + error
+            log += "   county total - elapsed time:  {}\n".format(datetime.timedelta(seconds=round(secs, 1)))
+
+            print(log, end='')
+            logs[fc] = log
+            errors[fc] = error
+
+            if job_scheduler:
+                job_scheduler.record_job(stage, fc, secs, error)
+
+            if on_complete:
+                on_complete(fc, error)
+
+    # merged timing log, one block per county in name order
+    with open(stage + '_parallel_output.txt', 'w') as f:
+        for fc in sorted(logs):
+            f.write(logs[fc])
+
+    return errors
+
+
+if __name__ == '__main__':
+
+    # name of the step script to run on all counties
+    stage = 'intersect_forest_parcels'
+
+    # number of worker processes, None = one per core
+    workers = None
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    errors = run_parallel(stage, workers)
+
+    failed = [fc for fc in errors if errors[fc]]
+    if failed:
+        print("\nfailed:  " + ", ".join(failed))
+
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
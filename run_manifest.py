@@ -0,0 +1,223 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Resumable statewide run of the forest parcel workflow.  Each county goes through the
+steps in order, and a run manifest records what has been done, so a run that fails
+partway through (schema lock, dropped T: drive) picks up where it left off instead of
+starting over.
+
+Steps (step name, script, layer the script's process() is given, layer it writes):
+  export     export_forest_parcels.py          Parcels_<County>                        _privateforest
+  acreage    add_acreages.py                   Parcels_<County>_privateforest          (same layer)
+  intersect  intersect_forest_parcels.py       Parcels_<County>_privateforest          _intersect
+  summary    calculate_summary_stats.py        Parcels_<County>_privateforest_intersect  _intersect_summary
+  join       forestpct_join_copy_calculate.py  Parcels_<County>_privateforest_intersect  _privateforest
+  threshold  export_forest_parcels_10pct.py    Parcels_<County>_privateforest          _10pct
+
+Manifest:  one JSON file per county in the manifest folder (so parallel county jobs never
+write the same file), with an entry per step:
+  key     - fingerprint of the step's inputs
+  output  - name and feature count of the layer it wrote
+
+The key of the export step is a fingerprint of the county parcel layer, the forest layer
+and the county's forest tile (tile_forest_layer.py), if it has been made:  their feature
+count, extent, fields and coordinate system (arcpy.Describe) and the size and modified time
+of their table files in the geodatabase, which change with any edit and cost no reads of
+the rows.  With content_hash = True it is a content hash instead (every row's attributes
+and geometry), which only changes when the data does, but reads every row of the forest
+layer in every worker and of every county on every rerun.  The key of each later step is
+a hash of the key of the step before it, so a change in the parcels or the forest makes
+every step after it stale, and nothing else.
+
+On a rerun, a step is skipped when its key matches and its output still exists with the
+recorded feature count.  Otherwise the step and everything after it is run again.
+
+A step is only recorded after it finishes, and the manifest file is replaced in one
+rename, so a half-written output is never treated as done.  Outputs left over from a
+failed step are deleted before the step runs again.
+
+Works with run_counties_parallel.py (stage 'run_manifest'), one county per worker.
+'''
+
+import arcpy
+import datetime
+import hashlib
+import importlib
+import json
+import os
+import time
+
+import forest_thresholds
+import gdb_lock
+import stage_timer
+import tile_forest_layer
+
+# workspace must be set prior to listing feature classes
+input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
+arcpy.env.workspace = input_gdb
+
+# feature layer containing forest cover layer
+forest = r'NLCD_2016_UT_Forest_polygon_NAD83utm12'
+
+# folder for the manifest files, next to the geodatabase
+manifest_dir = os.path.splitext(input_gdb)[0] + '_manifest'
+
+# fingerprint the inputs by their content (every row) instead of their file size and modified time
+content_hash = False
+
+# step name, script, suffix of the layer given to process(), suffix of the output.  The threshold
+# step writes one layer per cutoff (forest_thresholds.py), it is checked by the first one
+STEPS = [
+    ('export', 'export_forest_parcels', '', '_privateforest'),
+    ('acreage', 'add_acreages', '_privateforest', '_privateforest'),
+    ('intersect', 'intersect_forest_parcels', '_privateforest', '_privateforest_intersect'),
+    ('summary', 'calculate_summary_stats', '_privateforest_intersect', '_privateforest_intersect_summary'),
+    ('join', 'forestpct_join_copy_calculate', '_privateforest_intersect', '_privateforest'),
+    ('threshold', 'export_forest_parcels_10pct', '_privateforest', forest_thresholds.threshold_suffix(forest_thresholds.thresholds[0])),
+    ]
+
+# fingerprint of the forest layer, computed once per process
+_forest_hash = None
+
+
+def dataset_hash(dataset):
+    '''Content hash of a feature class or table:  every row's attributes and geometry.'''
+    fields = [f.name for f in arcpy.ListFields(dataset)
+              if f.type not in ('OID', 'Geometry', 'GlobalID', 'Blob', 'Raster')]
+    if arcpy.Describe(dataset).dataType == 'FeatureClass':
+        fields = ['SHAPE@WKB'] + fields
+
+    h = hashlib.sha1()
+    with arcpy.da.SearchCursor(dataset, ['OID@'] + fields) as cursor:
+        for row in cursor:
+            h.update(repr(row).encode())
+    return h.hexdigest()
+
+
+def table_token(dataset):
+    '''Size and modified time of the table files of a dataset in input_gdb, same as gdb_catalog.table_token.'''
+    # the table files of a file geodatabase are numbered by dataset ID, ex: 11 -> a0000000b.gdbtable
+    number = arcpy.Describe(dataset).DSID
+    token = []
+    for ext in ('.gdbtable', '.gdbtablx'):
+        path = os.path.join(input_gdb, 'a{:08x}{}'.format(number, ext))
+        if os.path.exists(path):
+            stat = os.stat(path)
+            token += [stat.st_size, stat.st_mtime_ns]
+    return token
+
+
+def dataset_fingerprint(dataset):
+    '''Fingerprint of a feature class or table in input_gdb, for the key of the export step.'''
+    if content_hash:
+        return dataset_hash(dataset)
+
+    # arcpy only, no reads of the rows
+    desc = arcpy.Describe(dataset)
+    key = [feature_count(dataset), [(f.name, f.type, f.length) for f in desc.fields], table_token(dataset)]
+    if desc.dataType == 'FeatureClass':
+        extent = desc.extent
+        key += [[extent.XMin, extent.YMin, extent.XMax, extent.YMax], desc.shapeType,
+                desc.spatialReference.factoryCode]
+    return hashlib.sha1(json.dumps(key, default=str).encode()).hexdigest()
+
+
+def feature_count(dataset):
+    return int(arcpy.GetCount_management(dataset)[0])
+
+
+def load_manifest(county):
+    path = os.path.join(manifest_dir, county + '.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(county, manifest):
+    # write a new file, then swap it in, so the manifest is never half written
+    os.makedirs(manifest_dir, exist_ok=True)
+    path = os.path.join(manifest_dir, county + '.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def is_done(entry, key):
+    '''True if a step was recorded with this key, and its output is still there.'''
+    if not entry or entry['key'] != key:
+        return False
+    output = entry['output']
+    return arcpy.Exists(output['name']) and feature_count(output['name']) == output['count']
+
+
+def list_jobs():
+    '''Names of the county parcel layers.'''
+    fcs = arcpy.ListFeatureClasses('Parcels_*', feature_type='polygon')  # returns a list of strings
+
+    # skip the outputs of the steps
+    return [fc for fc in fcs if 'privateforest' not in fc]
+
+
+def process(fc):
+    '''Run every step that is not already done for one county parcel layer.'''
+    global _forest_hash
+
+    print('\n', fc)
+    manifest = load_manifest(fc)
+
+    with stage_timer.StageTimer(fc, 'hash inputs', "   fingerprinting inputs"):
+        if _forest_hash is None:
+            _forest_hash = dataset_fingerprint(forest)
+        # the select and intersect steps use the county's forest tile when it has been made
+        tile = tile_forest_layer.forest_tile(fc)
+        tile_hash = dataset_fingerprint(tile) if arcpy.Exists(tile) else ''
+        key = hashlib.sha1((dataset_fingerprint(fc) + _forest_hash + tile_hash).encode()).hexdigest()
+
+    stale = False  # once a step is rerun, every step after it is rerun too
+    for step, script, in_suffix, out_suffix in STEPS:
+        key = hashlib.sha1((key + step).encode()).hexdigest()
+        output = fc + out_suffix
+
+        if not stale and is_done(manifest.get(step), key):
+            print("   {}:  up to date".format(step))
+            continue
+        stale = True
+
+        # remove the output of an earlier, failed attempt
+        # (acreage and join update the privateforest layer in place, it is left alone)
+        if step not in ('acreage', 'join') and arcpy.Exists(output):
+            with gdb_lock.gdb_write_lock(input_gdb):
+                arcpy.Delete_management(output)
+
+        # forget this step until it finishes
+        manifest.pop(step, None)
+        save_manifest(fc, manifest)
+
+        print("   {}:  running {}.py".format(step, script))
+        importlib.import_module(script).process(fc + in_suffix)
+
+        manifest[step] = {
+            'key': key,
+            'output': {'name': output, 'count': feature_count(output)},
+            'finished': datetime.datetime.now().isoformat(timespec='seconds'),
+            }
+        save_manifest(fc, manifest)
+
+
+if __name__ == '__main__':
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    # iterate through the county parcel layers
+    for fc in list_jobs():
+        process(fc)
+
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
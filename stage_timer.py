@@ -0,0 +1,263 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Timing of each step of the forest parcel scripts, saved as data instead of only
+printed to the console.
+
+Used in place of the starttime = time.time() / datetime.timedelta stopwatch:
+
+    with stage_timer.StageTimer(fc, 'intersect', "   intersecting forest pixels and private parcels") as t:
+        t.features_in = ...
+        (do the work)
+        t.features_out = ...
+
+features_in and features_out can also be functions, called once the clock is stopped, so a
+count that isn't part of the work (ex: arcpy.GetCount_management) isn't timed with it:
+
+        t.features_out = lambda: int(arcpy.GetCount_management(outtable)[0])
+
+prints the same "done - elapsed time" lines as before, and adds one record per county
+and stage to the timing log (JSON lines, one file shared by all scripts of a run):
+  run          run id (FOREST_RUN_ID environment variable, or the start time of the script)
+  county       layer name
+  stage        step name
+  started      start time
+  wall_secs    elapsed time
+  cpu_secs     CPU time of the thread that ran the stage.  Stages running at the same time in
+               other threads (prefetch.py) are not counted in it, and neither are threads
+               started by the stage itself
+  features_in, features_out, features_per_sec (features in, or out if no input count)
+  peak_rss_mb  peak memory of the process so far
+  stage_peak_mb   peak memory of the process during the stage (Linux, None elsewhere)
+  stage_added_mb  stage_peak_mb less the memory in use when the stage started, the memory
+                  the stage itself needed.  With stages running at the same time in other
+                  threads (prefetch.py), the peak is of the whole process, theirs included
+  error        exception, if the step failed
+
+Report:  python stage_timer.py <run log> [<baseline log>] [--csv <csv file>]
+prints the total time per stage of a run, and with a baseline log (an earlier run saved
+for comparison), the change in time per stage and the county/stage pairs that got slower.
+With --csv, the records of the run are also saved as a CSV file (write_csv()).
+'''
+
+import csv
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+# timing log, shared by all scripts and worker processes of a run
+log_path = os.environ.get('FOREST_TIMING_LOG', 'stage_timings.jsonl')
+
+run_id = os.environ.get('FOREST_RUN_ID', datetime.datetime.now().strftime('%Y%m%d_%H%M%S'))
+
+# slower than the baseline by more than this fraction is reported as a regression
+REGRESSION = 0.10
+
+FIELDS = ['run', 'county', 'stage', 'started', 'wall_secs', 'cpu_secs', 'features_in',
+          'features_out', 'features_per_sec', 'peak_rss_mb', 'stage_peak_mb', 'stage_added_mb', 'error']
+
+# peak memory of the process (MB) before the last reset of the Linux peak, see _stage_memory()
+_process_peak = 0.0
+
+# timers of the stages running now, and the lock for them and the peak
+_open_timers = set()
+_memory_lock = threading.Lock()
+
+
+def _status_mb(field):
+    # VmRSS (memory in use) or VmHWM (peak since the last reset) of this process, Linux only
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024  # KB
+    except OSError:
+        pass
+    return None
+
+
+def _stage_memory(timer, start):
+    # add the peak since the last reset to the stages running now, and reset it for a new stage.
+    # Writing 5 to clear_refs starts the peak (VmHWM) again from the memory in use (Linux 4.0)
+    global _process_peak
+    with _memory_lock:
+        peak = _status_mb('VmHWM')
+        if peak is None:
+            return
+        _process_peak = max(_process_peak, peak)
+        for t in _open_timers:
+            t.stage_peak = max(t.stage_peak, peak)
+
+        if start:
+            try:
+                with open('/proc/self/clear_refs', 'w') as f:
+                    f.write('5')
+            except OSError:
+                pass
+            timer.rss_start = _status_mb('VmRSS')
+            timer.stage_peak = timer.rss_start
+            _open_timers.add(timer)
+        else:
+            _open_timers.discard(timer)
+
+
+def peak_rss_mb():
+    '''Peak resident memory of this process, in MB (None if it can't be read).'''
+    try:
+        import resource  # Linux
+        # the Linux peak is reset at the start of each stage, the peak before it is kept
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, _process_peak)  # KB
+        return round(peak, 1)
+    except ImportError:
+        pass
+    try:
+        import psutil  # Windows
+        return round(psutil.Process().memory_info().peak_wset / 2 ** 20, 1)
+    except (ImportError, AttributeError):
+        return None
+
+
+def write_record(record):
+    # one write per line, so records from parallel workers don't get mixed
+    with open(log_path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+class StageTimer:
+    '''Times one stage of one county, prints the elapsed time and saves a timing record.'''
+
+    def __init__(self, county, stage, message=None, features_in=None):
+        self.county = county
+        self.stage = stage
+        self.message = message
+        self.features_in = features_in
+        self.features_out = None
+        self.rss_start = None
+        self.stage_peak = None
+
+    def __enter__(self):
+        if self.message:
+            print(self.message)
+        self.started = datetime.datetime.now().isoformat(timespec='seconds')
+        self.starttime = time.time()  # start the stopwatch
+        self.startcpu = time.thread_time()
+        _stage_memory(self, start=True)
+        return self
+
+    def _count(self, value, exc):
+        # a count given as a function is taken now, after the clock is stopped (not after an error)
+        if callable(value):
+            return value() if exc is None else None
+        return value
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.time() - self.starttime
+        cpu = time.thread_time() - self.startcpu
+        _stage_memory(self, start=False)
+
+        self.features_in = self._count(self.features_in, exc)
+        self.features_out = self._count(self.features_out, exc)
+
+        secs = round(wall, 1)
+        print("     done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
+
+        features = self.features_in if self.features_in is not None else self.features_out
+        write_record({
+            'run': run_id,
+            'county': self.county,
+            'stage': self.stage,
+            'started': self.started,
+            'wall_secs': round(wall, 3),
+            'cpu_secs': round(cpu, 3),
+            'features_in': self.features_in,
+            'features_out': self.features_out,
+            'features_per_sec': round(features / wall, 1) if features and wall > 0 else None,
+            'peak_rss_mb': peak_rss_mb(),
+            'stage_peak_mb': round(self.stage_peak, 1) if self.rss_start is not None else None,
+            'stage_added_mb': round(self.stage_peak - self.rss_start, 1) if self.rss_start is not None else None,
+            'error': repr(exc) if exc else None,
+            })
+
+        return False  # don't hide the exception
+
+
+def read_log(path, run=None):
+    '''Timing records from a JSON lines log, for one run (default: the last run in the log).'''
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if run is None and records:
+        run = records[-1]['run']
+    return [record for record in records if record['run'] == run]
+
+
+def write_csv(records, path):
+    '''Save timing records as a CSV file.'''
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def totals(records, key):
+    '''Sum of wall time, grouped by key(record).'''
+    out = defaultdict(float)
+    for record in records:
+        out[key(record)] += record['wall_secs']
+    return out
+
+
+def report(records, baseline=None):
+    '''Print the time per stage, compared to a baseline run if given.'''
+    by_stage = totals(records, lambda r: r['stage'])
+    base_stage = totals(baseline, lambda r: r['stage']) if baseline else {}
+
+    print("{:<20}{:>14}{:>14}{:>10}".format('stage', 'seconds', 'baseline', 'change'))
+    for stage in sorted(by_stage, key=by_stage.get, reverse=True):
+        line = "{:<20}{:>14.1f}".format(stage, by_stage[stage])
+        if stage in base_stage and base_stage[stage] > 0:
+            change = by_stage[stage] / base_stage[stage] - 1
+            line += "{:>14.1f}{:>+9.0%}".format(base_stage[stage], change)
+        print(line)
+
+    print("{:<20}{:>14.1f}".format('total', sum(by_stage.values())))
+
+    if not baseline:
+        return
+
+    # county / stage pairs slower than the baseline
+    by_pair = totals(records, lambda r: (r['county'], r['stage']))
+    base_pair = totals(baseline, lambda r: (r['county'], r['stage']))
+    slower = [(pair, by_pair[pair], base_pair[pair]) for pair in by_pair
+              if base_pair.get(pair) and by_pair[pair] > base_pair[pair] * (1 + REGRESSION)]
+
+    if slower:
+        print("\nslower than baseline (> {:.0%}):".format(REGRESSION))
+        for (county, stage), secs, base in sorted(slower, key=lambda x: x[1] - x[2], reverse=True):
+            print("   {} {}:  {:.1f} s (baseline {:.1f} s)".format(county, stage, secs, base))
+
+
+if __name__ == '__main__':
+
+    args = sys.argv[1:]
+    csv_path = None
+    if '--csv' in args:
+        i = args.index('--csv')
+        csv_path = args[i + 1]
+        del args[i:i + 2]
+
+    records = read_log(args[0])
+    baseline = read_log(args[1]) if len(args) > 1 else None
+
+    report(records, baseline)
+
+    if csv_path:
+        write_csv(records, csv_path)
+        print("\n{} records saved to {}".format(len(records), csv_path))
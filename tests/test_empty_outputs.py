@@ -0,0 +1,87 @@
+'''
+Counties with no features in an output layer (no private parcels, no forest, nothing over
+a cutoff) still get the layer, empty, as CopyFeatures of an empty selection.
+'''
+
+import geopandas as gpd
+import pyogrio
+import shapely
+
+import vector_intersect
+
+
+def parcels(n=3):
+    geoms = [shapely.box(i * 100, 0, i * 100 + 90, 90) for i in range(n)]
+    return gpd.GeoDataFrame({'OWN_TYPE': ['Private'] * n}, geometry=geoms, crs='EPSG:26912')
+
+
+def test_write_empty_layer(tmp_path):
+    gdb = str(tmp_path / 'test.gdb')
+    df = parcels()
+
+    vector_intersect.write_layer(df[df['OWN_TYPE'] == 'none'], gdb, 'Parcels_Test_privateforest')
+
+    info = pyogrio.read_info(gdb, layer='Parcels_Test_privateforest')
+    assert info['features'] == 0
+    assert info['geometry_type'] == 'MultiPolygon'
+    assert 'OWN_TYPE' in list(info['fields'])
+
+
+def test_replace_with_empty_layer(tmp_path):
+    gdb = str(tmp_path / 'test.gdb')
+    df = parcels()
+
+    vector_intersect.write_layer(df, gdb, 'Parcels_Test_privateforest')
+    vector_intersect.write_layer(df.iloc[:0], gdb, 'Parcels_Test_privateforest')
+
+    assert pyogrio.read_info(gdb, layer='Parcels_Test_privateforest')['features'] == 0
+
+
+def test_pushdown_select_no_forest(tmp_path):
+    import forest_index
+    import pushdown_select
+
+    gdb = str(tmp_path / 'test.gdb')
+    vector_intersect.write_layer(parcels(), gdb, 'Parcels_Test')
+
+    # forest far from the county
+    forest = gpd.GeoDataFrame(geometry=[shapely.box(10000, 10000, 10030, 10030)], crs='EPSG:26912')
+    vector_intersect.write_layer(forest, gdb, 'Forest')
+    index = forest_index.open_index(gdb, 'Forest', index_dir=str(tmp_path / 'index'))
+
+    counts = pushdown_select.select_forest_parcels(gdb, 'Parcels_Test', 'Forest', 'Parcels_Test_privateforest', index)
+
+    assert counts['private'] == 3 and counts['forest'] == 0
+    assert pyogrio.read_info(gdb, layer='Parcels_Test_privateforest')['features'] == 0
+
+
+def test_pushdown_select_no_private_parcels(tmp_path):
+    import forest_index
+    import pushdown_select
+
+    gdb = str(tmp_path / 'test.gdb')
+    public = parcels()
+    public['OWN_TYPE'] = 'Public'
+    vector_intersect.write_layer(public, gdb, 'Parcels_Test')
+    vector_intersect.write_layer(parcels(), gdb, 'Forest')
+    index = forest_index.open_index(gdb, 'Forest', index_dir=str(tmp_path / 'index'))
+
+    counts = pushdown_select.select_forest_parcels(gdb, 'Parcels_Test', 'Forest', 'Parcels_Test_privateforest', index)
+
+    assert counts['private'] == 0
+    assert pyogrio.read_info(gdb, layer='Parcels_Test_privateforest')['features'] == 0
+
+
+def test_tiled_intersect_no_forest(tmp_path):
+    import tiled_intersect
+
+    gdb = str(tmp_path / 'test.gdb')
+    vector_intersect.write_layer(parcels(), gdb, 'Parcels_Test_privateforest')
+    forest = gpd.GeoDataFrame(geometry=[shapely.box(10000, 10000, 10030, 10030)], crs='EPSG:26912')
+    vector_intersect.write_layer(forest, gdb, 'Forest')
+    vector_intersect.write_layer(parcels().iloc[:0], gdb, 'Parcels_None_privateforest')
+
+    for fc in ('Parcels_Test_privateforest', 'Parcels_None_privateforest'):
+        count, tiles = tiled_intersect.intersect_layer_tiled(gdb, fc, 'Forest', fc + '_intersect')
+        assert count == 0
+        assert pyogrio.read_info(gdb, layer=fc + '_intersect')['features'] == 0
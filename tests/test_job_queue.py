@@ -0,0 +1,113 @@
+'''
+The job queue with several worker processes on one machine:  each job runs once, the job
+of a killed worker is run again when its lease runs out, and a job whose worker dies every
+time stops at max_attempts.
+'''
+
+import multiprocessing
+import os
+import signal
+import time
+
+import pytest
+
+import job_queue
+
+# a step script for the queue:  process() logs each run of a job to a file
+STEP = '''
+import os
+import time
+
+
+def process(job):
+    folder = os.environ['JOB_QUEUE_TEST_DIR']
+    if job == 'slow' and not os.path.exists(os.path.join(folder, 'slow_started')):
+        open(os.path.join(folder, 'slow_started'), 'w').close()
+        time.sleep(600)  # the first worker is killed here
+    if job == 'crash':
+        os._exit(1)  # the worker dies every time
+    with open(os.path.join(folder, 'runs.txt'), 'a') as f:
+        f.write(job + '\\n')
+'''
+
+# worker processes are forked, so they get the test settings and sys.path
+fork = multiprocessing.get_context('fork')
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    (tmp_path / 'queue_test_step.py').write_text(STEP)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv('JOB_QUEUE_TEST_DIR', str(tmp_path))
+    monkeypatch.setattr(job_queue, 'lease_secs', 1)
+    monkeypatch.setattr(job_queue, 'poll_secs', 0.1)
+    monkeypatch.setattr(job_queue, 'max_attempts', 2)
+    return str(tmp_path / 'queue.db')
+
+
+def start_workers(path, n):
+    processes = [fork.Process(target=job_queue.work, args=(path,)) for i in range(n)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+def join(processes, timeout=60):
+    for process in processes:
+        process.join(timeout)
+        assert not process.is_alive()
+
+
+def runs(tmp_path):
+    path = tmp_path / 'runs.txt'
+    return path.read_text().split() if path.exists() else []
+
+
+def job_rows(path):
+    conn = job_queue.connect(path)
+    rows = dict((row['job'], row) for row in conn.execute('SELECT * FROM jobs'))
+    conn.close()
+    return rows
+
+
+def test_each_job_runs_once(queue, tmp_path):
+    jobs = ['job{:02d}'.format(i) for i in range(20)]
+    assert job_queue.submit('queue_test_step', jobs, queue) == 20
+
+    join(start_workers(queue, 4))
+
+    assert sorted(runs(tmp_path)) == jobs
+    assert all(row['status'] == 'done' and row['attempts'] == 1 for row in job_rows(queue).values())
+
+
+def test_killed_worker_job_is_retried(queue, tmp_path):
+    job_queue.submit('queue_test_step', ['slow', 'fast'], queue)
+
+    # the first worker takes the slow job (the most costly first, then by id) and is killed
+    first = start_workers(queue, 1)[0]
+    deadline = time.time() + 30
+    while not (tmp_path / 'slow_started').exists():
+        assert time.time() < deadline
+        time.sleep(0.05)
+    os.kill(first.pid, signal.SIGKILL)
+    first.join()
+
+    # the other workers wait for its lease to run out, and run the job again
+    join(start_workers(queue, 2))
+
+    rows = job_rows(queue)
+    assert rows['slow']['status'] == 'done' and rows['slow']['attempts'] == 2
+    assert sorted(runs(tmp_path)) == ['fast', 'slow']
+
+
+def test_job_stops_at_max_attempts(queue, tmp_path):
+    job_queue.submit('queue_test_step', ['crash'], queue)
+
+    # each worker dies on the job, the next one takes it again once the lease runs out
+    for attempt in range(job_queue.max_attempts + 1):
+        join(start_workers(queue, 1))
+
+    row = job_rows(queue)['crash']
+    assert row['status'] == 'failed'
+    assert row['attempts'] == job_queue.max_attempts
+    assert 'lease expired' in row['error']
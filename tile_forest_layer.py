@@ -0,0 +1,95 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Cuts the statewide forest cover layer into one tile per county, so the select and
+intersect steps only search the forest polygons near that county.
+
+Each county parcel layer is otherwise overlaid against the whole statewide layer
+(NLCD_2016_UT_Forest_polygon_NAD83utm12), most of which is outside that county.
+
+For each "Parcels_<County>" layer, the output extent environment is set to the extent
+of the county parcels, and the forest layer is copied to a tile named
+"NLCD_2016_UT_Forest_polygon_NAD83utm12_<County>"
+https://pro.arcgis.com/en/pro-app/tool-reference/environment-settings/output-extent.htm
+
+Forest polygons crossing the edge of the extent are copied whole, not clipped.  A polygon
+near a county line can be in more than one tile, but each county only uses its own tile,
+and forest acres are summed per parcel, so no acreage is counted twice.
+
+export_forest_parcels.py and intersect_forest_parcels.py use the county tile when it
+exists, and the statewide layer otherwise.  Rerun this script when the forest layer or
+a county's parcel extent changes.
+'''
+
+import arcpy
+import datetime
+import time
+
+import gdb_lock
+import stage_timer
+
+# workspace must be set prior to listing feature classes
+input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
+arcpy.env.workspace = input_gdb
+
+# feature layer containing forest cover layer
+forest = r'NLCD_2016_UT_Forest_polygon_NAD83utm12'
+
+
+def forest_tile(fc):
+    '''Name of the forest tile for a county layer.
+
+    ex: "Parcels_Grand" or "Parcels_Grand_privateforest" -> "NLCD_2016_UT_Forest_polygon_NAD83utm12_Grand"
+    '''
+    county = fc.split('_')[1]
+    return forest + '_' + county
+
+
+def county_forest(fc):
+    '''The forest tile for a county layer if it has been made, otherwise the statewide forest layer.'''
+    tile = forest_tile(fc)
+    if arcpy.Exists(tile):
+        return tile
+    return forest
+
+
+def list_jobs():
+    '''Names of the county parcel layers.'''
+    # get all feature classes in the workspace
+    fcs = arcpy.ListFeatureClasses('Parcels_*', feature_type='polygon')  # returns a list of strings
+
+    # skip the outputs of the other steps
+    return [fc for fc in fcs if 'privateforest' not in fc]
+
+
+def process(fc):
+    '''Copy the forest polygons within the extent of one county parcel layer to its tile.'''
+    print('\n', fc)
+
+    with stage_timer.StageTimer(fc, 'tile forest', "   copying forest polygons within the county extent") as t:
+        arcpy.env.extent = arcpy.Describe(fc).extent
+        try:
+            # other county jobs add layers to the same geodatabase (run_counties_parallel.py)
+            with gdb_lock.gdb_write_lock(input_gdb):
+                arcpy.CopyFeatures_management(forest, forest_tile(fc))
+        finally:
+            arcpy.env.extent = None  # back to the default (union of inputs)
+        t.features_out = lambda: int(arcpy.GetCount_management(forest_tile(fc))[0])
+
+
+if __name__ == '__main__':
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    # iterate through the county parcel layers
+    for fc in list_jobs():
+        process(fc)
+
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))
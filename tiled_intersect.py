@@ -0,0 +1,138 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Tiled version of vector_intersect.intersect_layer() for the largest counties, where the
+parcels and the forest polygons around them don't fit in memory at once.
+
+The county extent is split into tiles small enough for a memory budget, and the parcels
+and forest polygons are read, intersected and written one tile at a time, so the peak
+memory depends on the budget, not on the size of the county.
+
+Tiles:  the extent of the parcel layer is split in four, and each quarter again, until a
+tile holds no more than max_features parcels and forest polygons (counted from their
+bounding boxes only:  the parcel bounds, and the forest index or forest bounds).  Dense
+parts of the county get small tiles, empty parts large ones.
+
+Exact totals:  in each tile, the parcels and forest polygons are cut to the tile before the
+intersect, so a parcel crossing a tile edge is intersected in pieces, one per tile, and the
+pieces never overlap.  The Forest_Acres of the pieces of a parcel add up to the same total
+as one untiled intersect (to floating point rounding), so the sums of
+calculate_summary_stats.py are unchanged.  The _intersect layer does have more features:
+an intersected polygon on a tile edge is split into one feature per tile.
+
+The memory budget is converted to a feature count with BYTES_PER_FEATURE, an estimate of
+the memory used by a parcel or forest pixel polygon, its attributes and its intersects.
+A single parcel with more forest than the budget can't be split below MIN_TILE_SIZE.
+'''
+
+import pyogrio
+import shapely
+
+import vector_intersect
+
+# estimated memory per parcel or forest polygon in a tile, with its intersects (bytes)
+BYTES_PER_FEATURE = 4096
+
+# tiles are not split below this size (meters)
+MIN_TILE_SIZE = 250.0
+
+
+def count_boxes(bounds, box):
+    '''Number of bounding boxes (n, 4) touching box (xmin, ymin, xmax, ymax).'''
+    return int(((bounds[:, 0] <= box[2]) & (bounds[:, 2] >= box[0]) &
+                (bounds[:, 1] <= box[3]) & (bounds[:, 3] >= box[1])).sum())
+
+
+def plan_tiles(extent, parcel_bounds, count_forest, max_features, min_size=MIN_TILE_SIZE):
+    '''Split an extent into tiles of at most max_features parcels and forest polygons.
+
+    count_forest(box) returns the number of forest polygons touching a box.
+    Returns a list of (xmin, ymin, xmax, ymax), in rows from the bottom left.
+    '''
+    tiles = []
+    todo = [tuple(extent)]
+    while todo:
+        box = todo.pop()
+        xmin, ymin, xmax, ymax = box
+        n = count_boxes(parcel_bounds, box)
+        if n == 0:
+            continue
+
+        if n + count_forest(box) <= max_features or max(xmax - xmin, ymax - ymin) <= min_size:
+            tiles.append(box)
+            continue
+
+        xmid, ymid = (xmin + xmax) / 2, (ymin + ymax) / 2
+        todo += [(xmin, ymin, xmid, ymid), (xmid, ymin, xmax, ymid),
+                 (xmin, ymid, xmid, ymax), (xmid, ymid, xmax, ymax)]
+
+    return sorted(tiles, key=lambda box: (box[1], box[0]))
+
+
+def clip(df, box):
+    '''Cut the geometries of a GeoDataFrame to a box, dropping the ones left empty.'''
+    df = df.copy()
+    df[df.geometry.name] = shapely.intersection(df.geometry.values, shapely.box(*box))
+    return df[~shapely.is_empty(df.geometry.values)]
+
+
+def intersect_layer_tiled(gdb, parcel_layer, forest_layer, out_layer, memory_mb=2000, index=None):
+    '''Intersect a parcel feature class with the forest layer, one tile at a time.
+
+    The intersect features are written to out_layer as each tile is done.
+    index is an optional forest_index.ForestIndex, used to count and read the forest polygons.
+
+    Returns (number of intersect features, number of tiles)
+    '''
+    max_features = int(memory_mb * 2 ** 20 / BYTES_PER_FEATURE)
+
+    # bounding boxes only, the parcels themselves are not read
+    fids, parcel_bounds = pyogrio.read_bounds(gdb, layer=parcel_layer)
+    parcel_bounds = parcel_bounds.T  # (n, 4)
+
+    if len(fids) == 0:
+        # no parcels, the output is an empty layer with the fields of both inputs
+        parcels = vector_intersect.read_layer(gdb, parcel_layer, fids=[])
+        forest = vector_intersect.read_layer(gdb, forest_layer, fids=[])
+        vector_intersect.write_layer(vector_intersect.intersect_frames(parcels, forest, parcel_layer, forest_layer),
+                                     gdb, out_layer)
+        return 0, 0
+
+    extent = (parcel_bounds[:, 0].min(), parcel_bounds[:, 1].min(),
+              parcel_bounds[:, 2].max(), parcel_bounds[:, 3].max())
+
+    if index is not None:
+        count_forest = lambda box: len(index.query(box))
+    else:
+        count_forest = lambda box: len(pyogrio.read_bounds(gdb, layer=forest_layer, bbox=box)[0])
+
+    tiles = plan_tiles(extent, parcel_bounds, count_forest, max_features)
+    del fids, parcel_bounds
+
+    count = 0
+    empty = None
+    for box in tiles:
+        parcels = clip(vector_intersect.read_layer(gdb, parcel_layer, bbox=box), box)
+        if index is not None:
+            forest = vector_intersect.read_layer(gdb, forest_layer, fids=index.query(box))
+        else:
+            forest = vector_intersect.read_layer(gdb, forest_layer, bbox=box)
+        forest = clip(forest, box)
+
+        pieces = vector_intersect.intersect_frames(parcels, forest, parcel_layer, forest_layer)
+        if len(pieces) == 0:
+            empty = pieces
+            continue
+
+        # the first tile replaces the layer, the others are added to it
+        vector_intersect.write_layer(pieces, gdb, out_layer, append=count > 0)
+        count += len(pieces)
+
+    if count == 0 and empty is not None:
+        vector_intersect.write_layer(empty, gdb, out_layer)
+
+    return count, len(tiles)
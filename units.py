@@ -0,0 +1,29 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Area and length units of the acreage fields, the unit names accepted by the scripts
+(the !SHAPE.AREA@ACRES! / !shape.length@feet! units), for measure.py and the arcpy scripts
+(add_acreages.py).
+
+No imports, so it loads in ArcGIS Pro without NumPy or Shapely.
+'''
+
+# square meters per area unit
+AREA_UNITS = {
+    'acres': 4046.8564224,
+    'hectares': 10000.0,
+    'squarefeet': 0.09290304,
+    'squaremiles': 2589988.110336,
+    'squaremeters': 1.0,
+    }
+
+# meters per length unit
+LENGTH_UNITS = {
+    'feet': 0.3048,
+    'meters': 1.0,
+    'miles': 1609.344,
+    }
@@ -0,0 +1,172 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+In-process intersect engine, used by intersect_forest_parcels.py as an alternative
+to arcpy.Intersect_analysis([fc, forest], fc + "_intersect", "ALL")
+
+The parcel layer and the forest pixel polygon layer are read from the geodatabase
+into arrays of geometries with pyogrio (GDAL OpenFileGDB driver), so this runs on
+Linux without arcpy.  Only the forest polygons inside the extent of the parcel
+layer are read.
+
+An STR-tree is built over the forest polygons and queried with all of the parcels
+at once to get every (parcel, forest polygon) candidate pair.  The intersections
+and their areas are then computed in bulk with the Shapely 2 vectorized functions.
+
+Output matches the Intersect tool output used by the later steps:
+  FID_<parcel layer>  - OBJECTID of the original privateforest parcel
+  FID_<forest layer>  - OBJECTID of the forest pixel polygon
+  Forest_Acres        - area of the intersected polygon, in acres
+plus the attributes of both inputs ("ALL")
+
+https://shapely.readthedocs.io/en/stable/strtree.html
+'''
+
+import geopandas as gpd
+import numpy as np
+import pyogrio
+import shapely
+
+import gdb_lock
+import measure
+
+# square meters in one acre.  The parcel and forest layers are in NAD83 UTM zone 12N,
+# so geometry areas come back in square meters
+SQ_METERS_PER_ACRE = measure.AREA_UNITS['acres']
+
+
+def list_polygon_layers(gdb):
+    '''Return the names of the polygon feature classes in a geodatabase.
+
+    Equivalent of arcpy.ListFeatureClasses(feature_type='polygon')
+    '''
+    layers = pyogrio.list_layers(gdb)  # array of [name, geometry type] pairs
+    return [name for name, geomtype in layers if geomtype in ('Polygon', 'MultiPolygon')]
+
+
+def read_layer(gdb, layer, columns=None, bbox=None, where=None, fids=None):
+    '''Read a feature class into a GeoDataFrame, indexed by OBJECTID.'''
+    return pyogrio.read_dataframe(
+        gdb,
+        layer=layer,
+        columns=columns,
+        bbox=bbox,
+        where=where,
+        fids=fids,
+        fid_as_index=True
+        )
+
+
+# the locks are in gdb_lock.py, which the arcpy scripts also use
+gdb_write_lock = gdb_lock.gdb_write_lock
+gdb_read_lock = gdb_lock.gdb_read_lock
+
+
+def write_layer(df, gdb, layer, append=False):
+    '''Write a GeoDataFrame to a feature class (or a DataFrame to a table), replacing it if it already exists.
+
+    With append=True, the rows are added to the existing layer instead.
+    An empty GeoDataFrame is written as an empty MultiPolygon feature class (like CopyFeatures
+    of an empty selection), since the geometry type can't be taken from the rows.
+    '''
+    geometry_type = None
+    if len(df) == 0 and isinstance(df, gpd.GeoDataFrame):
+        geometry_type = 'MultiPolygon'
+
+    with gdb_write_lock(gdb):
+        pyogrio.write_dataframe(df, gdb, layer=layer, driver='OpenFileGDB', promote_to_multi=True, append=append,
+                                geometry_type=geometry_type)
+
+
+def _polygon_parts(geom):
+    # the intersection of two polygons that also touch along an edge comes back as a
+    # GeometryCollection.  Intersect_analysis only keeps the polygon parts
+    parts = shapely.get_parts(geom)
+    parts = parts[np.isin(shapely.get_type_id(parts), [3, 6])]  # Polygon, MultiPolygon
+    return shapely.union_all(parts)
+
+
+def intersect_geometries(parcel_geoms, forest_geoms):
+    '''Intersect two arrays of polygons.
+
+    Returns four arrays, one entry per intersected polygon:
+    index into parcel_geoms, index into forest_geoms, intersected geometry, area in acres
+    '''
+    parcel_geoms = np.asarray(parcel_geoms)
+    forest_geoms = np.asarray(forest_geoms)
+
+    # candidate search: every pair whose geometries intersect, in one query
+    tree = shapely.STRtree(forest_geoms)
+    parcel_idx, forest_idx = tree.query(parcel_geoms, predicate='intersects')
+
+    pieces = shapely.intersection(parcel_geoms[parcel_idx], forest_geoms[forest_idx])
+    acres = measure.polygon_areas(pieces, 'acres')
+
+    # pixels that only touch a parcel boundary intersect as lines or points, drop them
+    keep = acres > 0
+    parcel_idx, forest_idx, pieces, acres = parcel_idx[keep], forest_idx[keep], pieces[keep], acres[keep]
+
+    collections = shapely.get_type_id(pieces) == 7  # GeometryCollection
+    if collections.any():
+        pieces[collections] = [_polygon_parts(g) for g in pieces[collections]]
+
+    return parcel_idx, forest_idx, pieces, acres
+
+
+def intersect_frames(parcels, forest, parcel_layer, forest_layer):
+    '''Intersect two GeoDataFrames (indexed by OBJECTID), like Intersect_analysis "ALL".
+
+    Returns a GeoDataFrame with the FID_<layer> fields, the attributes of both inputs
+    and Forest_Acres holding the area of each intersected polygon.
+    '''
+    parcel_idx, forest_idx, pieces, acres = intersect_geometries(
+        parcels.geometry.values, forest.geometry.values)
+
+    parcel_attrs = parcels.drop(columns=parcels.geometry.name).iloc[parcel_idx].reset_index(drop=True)
+    forest_attrs = forest.drop(columns=forest.geometry.name).iloc[forest_idx].reset_index(drop=True)
+
+    # Intersect_analysis appends "_1" to field names that are in both inputs
+    forest_attrs.columns = [c + '_1' if c in parcel_attrs.columns else c for c in forest_attrs.columns]
+
+    out = parcel_attrs.join(forest_attrs)
+    # the geodatabase has no 64 bit integers
+    out.insert(0, 'FID_' + parcel_layer, parcels.index.values[parcel_idx].astype('int32'))
+    out.insert(1, 'FID_' + forest_layer, forest.index.values[forest_idx].astype('int32'))
+    out['Forest_Acres'] = acres
+
+    return gpd.GeoDataFrame(out, geometry=pieces, crs=parcels.crs)
+
+
+def read_forest(gdb, forest_layer, parcels, index=None):
+    '''Read the forest polygons near a set of parcels.
+
+    With a forest_index.ForestIndex, only the polygons whose bounding box touches a parcel
+    bounding box are read.  Otherwise all polygons within the extent of the parcels are read.
+    With no parcels (a county without private parcels), no polygons are read.
+    '''
+    if len(parcels) == 0:
+        return read_layer(gdb, forest_layer, fids=[])
+    if index is not None:
+        return read_layer(gdb, forest_layer, fids=index.query_boxes(parcels.bounds.values))
+    return read_layer(gdb, forest_layer, bbox=tuple(parcels.total_bounds))
+
+
+def intersect_layer(gdb, parcel_layer, forest_layer, out_layer=None, index=None):
+    '''Intersect a parcel feature class with the forest layer, in one step.
+
+    Reads only the forest polygons near the parcels (see read_forest).
+    If out_layer is given, the result is also written to the geodatabase.
+    '''
+    parcels = read_layer(gdb, parcel_layer)
+    forest = read_forest(gdb, forest_layer, parcels, index)
+
+    out = intersect_frames(parcels, forest, parcel_layer, forest_layer)
+
+    if out_layer:
+        write_layer(out, gdb, out_layer)
+
+    return out
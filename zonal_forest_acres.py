@@ -0,0 +1,232 @@
+# Justin Johnson
+# Senior GIS Analyst
+# Utah Division of Forestry, Fire and State Lands
+# October 2026
+
+'''
+Summary:
+Raster-native alternative to the polygon overlay in intersect_forest_parcels.py,
+calculate_summary_stats.py and forestpct_join_copy_calculate.py
+
+The forest polygon layer (NLCD_2016_UT_Forest_polygon_NAD83utm12) is a polygonized
+copy of the 30m NLCD raster.  This script skips it and reads the NLCD land cover
+raster directly.
+- National Land Cover Dataset: https://www.mrlc.gov/national-land-cover-database-nlcd-2016
+
+For each privateforest parcel layer, the parcels are rasterized onto the same 30m grid
+as the NLCD raster (burning in a zone number per parcel), and the forest pixels are counted
+per parcel.  The raster is read in strips of rows, only within the extent of the county,
+so a statewide run is one streamed pass over the raster.
+
+Forest_Acres = forest pixels * pixel area in acres
+Forest_pct   = Forest_Acres / Parcel_Acres * 100
+
+Fractional coverage (optional):  a pixel on a parcel edge is only counted for the parcel
+containing the pixel center.  With fractional = True, each strip is rasterized at a finer
+grid (supersample x supersample sub-pixels per 30m pixel), so edge pixels are split between
+the parcels by the fraction of the pixel they cover.  This keeps the acreage close to the
+vector intersect result, and small parcels no longer fall between pixel centers.
+
+Output:  the Forest_Acres and Forest_pct fields of each privateforest layer are filled in
+(parcels with no forest pixels, or with no Parcel_Acres, get 0).  With arcpy, the two fields
+are updated in place, so the OBJECTIDs and the schema of the layer don't change.  Without it,
+the layer is written again, and the original OBJECTID of each parcel is kept in Parcel_OID
+'''
+
+import datetime
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import rasterio
+import rasterio.features
+import shapely
+from affine import Affine
+from rasterio.windows import Window
+
+import stage_timer
+import vector_intersect
+
+try:
+    import arcpy  # ArcGIS Pro:  the fields are updated in place
+except ImportError:
+    arcpy = None
+
+input_gdb = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\Parcels_Utah_2020.gdb'
+
+# NLCD land cover raster (all classes), on its original 30m grid
+nlcd_raster = r'T:\Shared drives\DNR_FFSL\Forestry\GIS\Forest Stewardship\NLCD_2016_Land_Cover_UT.tif'
+
+# split edge pixels between parcels by fractional coverage
+fractional = True
+supersample = 5  # sub-pixels per side of a 30m pixel, when fractional = True
+
+# NLCD forest classes:  41 deciduous, 42 evergreen, 43 mixed forest
+FOREST_CLASSES = [41, 42, 43]
+
+
+def county_window(src, bounds):
+    '''Window of the raster covering bounds (xmin, ymin, xmax, ymax), snapped to whole pixels.'''
+    xmin, ymin, xmax, ymax = bounds
+    row0, col0 = src.index(xmin, ymax)  # upper left pixel
+    row1, col1 = src.index(xmax, ymin)  # lower right pixel
+
+    # clip to the raster
+    row0, col0 = max(row0, 0), max(col0, 0)
+    row1, col1 = min(row1, src.height - 1), min(col1, src.width - 1)
+
+    return Window(col0, row0, col1 - col0 + 1, row1 - row0 + 1)
+
+
+def zonal_class_counts(parcels, src, groups, fractional=False, supersample=5, block_rows=512):
+    '''Count the pixels of each group of classes under each parcel, in one pass over the raster.
+
+    parcels is a GeoDataFrame in the CRS of the raster.
+    groups is a list of lists of raster values, ex: [[41, 42, 43], [52]]
+    Returns an array of (fractional) pixel counts, one row per parcel (in the order of
+    parcels) and one column per group.
+    '''
+    ngroups = len(groups)
+
+    # raster value -> column of its group, -1 for values in no group (the last entry is for
+    # every value above the largest class)
+    lookup = np.full(max(max(classes) for classes in groups) + 2, -1, dtype='int16')
+    for i, classes in enumerate(groups):
+        lookup[classes] = i
+
+    # zone 0 is the fill value (no parcel), parcel i is burned in as zone i + 1
+    counts = np.zeros((len(parcels) + 1) * ngroups, dtype='float64')
+    if fractional:
+        scale = supersample
+        block_rows = max(1, block_rows // scale)  # keep the sub-pixel strips the same size in memory
+    else:
+        scale = 1
+
+    window = county_window(src, parcels.total_bounds)
+    geoms = parcels.geometry.values
+    zone_ids = np.arange(1, len(parcels) + 1, dtype='int32')
+    tree = shapely.STRtree(geoms)
+
+    # stream through the county window a strip of rows at a time
+    for row_off in range(window.row_off, window.row_off + window.height, block_rows):
+        strip = Window(window.col_off, row_off, window.width,
+                       min(block_rows, window.row_off + window.height - row_off))
+        strip_transform = src.window_transform(strip)
+
+        # only burn in the parcels that overlap this strip
+        strip_box = shapely.box(*rasterio.windows.bounds(strip, src.transform))
+        idx = tree.query(strip_box, predicate='intersects')
+        if len(idx) == 0:
+            continue
+
+        landcover = src.read(1, window=strip)
+        group = lookup[np.minimum(landcover, len(lookup) - 1)]
+        mask = group >= 0
+        if not mask.any():
+            continue
+
+        if scale > 1:
+            # sub-pixel grid, each 30m pixel is split into scale x scale cells
+            group = np.repeat(np.repeat(group, scale, axis=0), scale, axis=1)
+            mask = group >= 0
+            strip_transform = strip_transform * Affine.scale(1 / scale)
+
+        zones = rasterio.features.rasterize(
+            zip(geoms[idx], zone_ids[idx]),
+            out_shape=mask.shape,
+            transform=strip_transform,
+            fill=0,
+            dtype='int32'
+            )
+
+        # one count per (zone, group) pair
+        counts += np.bincount(zones[mask] * ngroups + group[mask], minlength=len(counts))
+
+    return counts.reshape(-1, ngroups)[1:] / (scale * scale)
+
+
+def zonal_pixel_counts(parcels, src, classes, fractional=False, supersample=5, block_rows=512):
+    '''Count the pixels of the given classes under each parcel.
+
+    parcels is a GeoDataFrame indexed by OBJECTID, in the CRS of the raster.
+    Returns an array of (fractional) pixel counts, indexed by OBJECTID.
+    '''
+    counts = np.zeros(parcels.index.max() + 1, dtype='float64')
+    counts[parcels.index.values] = zonal_class_counts(parcels, src, [classes], fractional, supersample, block_rows)[:, 0]
+    return counts
+
+
+def forest_acres(parcels, raster_path, classes=FOREST_CLASSES, fractional=False, supersample=5):
+    '''Forest acres for each parcel, as a pandas Series indexed by OBJECTID.'''
+    with rasterio.open(raster_path) as src:
+        # NLCD is distributed in Albers equal area.  Put the parcels on the raster grid
+        parcels = parcels.to_crs(src.crs)
+        pixel_acres = abs(src.transform.a * src.transform.e) / vector_intersect.SQ_METERS_PER_ACRE
+
+        counts = zonal_pixel_counts(parcels, src, classes, fractional, supersample)
+
+    return pd.Series(counts[parcels.index.values] * pixel_acres, index=parcels.index)
+
+
+def list_jobs():
+    '''Names of the private forest parcel layers.'''
+    # get all feature class names in the geodatabase, as a list of strings
+    fcs = vector_intersect.list_polygon_layers(input_gdb)
+
+    # only use the FCs that end with "privateforest"
+    return [fc for fc in fcs if fc[-13:] == "privateforest"]
+
+
+def forest_pct(acres, parcel_acres):
+    '''Forest_pct from Forest_Acres and Parcel_Acres, 0 where Parcel_Acres is 0 or missing.'''
+    parcel_acres = parcel_acres.fillna(0)
+    return (acres / parcel_acres.where(parcel_acres > 0) * 100).fillna(0)
+
+
+def save_forest_acres(fc, parcels):
+    '''Write Forest_Acres and Forest_pct back to a private forest parcel layer.
+
+    With arcpy, only the two fields are updated, keyed by OBJECTID.  Without it, the layer
+    is written again and its features are numbered from 1, so the original OBJECTID is kept
+    in Parcel_OID (the key of the FID_ fields of the intersect outputs).
+    '''
+    if arcpy is not None:
+        acres = parcels['Forest_Acres'].to_dict()
+        pct = parcels['Forest_pct'].to_dict()
+        with arcpy.da.UpdateCursor(os.path.join(input_gdb, fc), ['OID@', 'Forest_Acres', 'Forest_pct']) as cursor:
+            for oid, _, _ in cursor:
+                cursor.updateRow([oid, acres.get(oid, 0), pct.get(oid, 0)])
+        return
+
+    if 'Parcel_OID' not in parcels.columns:
+        parcels['Parcel_OID'] = parcels.index.values.astype('int32')
+    vector_intersect.write_layer(parcels, input_gdb, fc)
+
+
+def process(fc):
+    '''Fill in Forest_Acres and Forest_pct of one private forest parcel layer from the NLCD raster.'''
+    print('\n', fc)
+
+    with stage_timer.StageTimer(fc, 'zonal forest acres', "   counting forest pixels per parcel") as t:
+        parcels = vector_intersect.read_layer(input_gdb, fc)
+        parcels['Forest_Acres'] = forest_acres(parcels, nlcd_raster, FOREST_CLASSES, fractional, supersample)
+        t.features_in = len(parcels)
+
+    with stage_timer.StageTimer(fc, 'save', "   calculating Forest_pct and saving", len(parcels)):
+        parcels['Forest_pct'] = forest_pct(parcels['Forest_Acres'], parcels['Parcel_Acres'])
+        save_forest_acres(fc, parcels)
+
+
+if __name__ == '__main__':
+
+    print("starting")
+    t1 = time.time() # start the timer to measure total runtime
+
+    # iterate through the feature classes
+    for fc in list_jobs():
+        process(fc)
+
+    t2 = time.time() # stop the total runtime timer
+    secs = round(t2 - t1, 1)
+    print("done - elapsed time: ", str(datetime.timedelta(seconds=secs)))